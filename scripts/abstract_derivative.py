@@ -36,7 +36,7 @@ def __init__(self):
 
 
     @abc.abstractmethod
-    def price_monte_carlo(self, N, epsilon=0, param__=None):
+    def price_monte_carlo(self, N, epsilon=0, param__=None, rng=None):
         """Prices derivative under Black&Scholes assumptions
 
         Args:
@@ -45,6 +45,8 @@ def price_monte_carlo(self, N, epsilon=0, param__=None):
                                        to compute greeks with finite difference method easily. Defaults to 0.
             param__ (str, optional): parameter of black & scholes model to offset with 
                                     espsilon if diffrent this None. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
 
         Raises:
             NotImplementedError: Not implemented yet
@@ -53,7 +55,7 @@ def price_monte_carlo(self, N, epsilon=0, param__=None):
 
 
     @abc.abstractmethod
-    def greeks_difference_method(self, N, epsilon, param__, order=1):
+    def greeks_difference_method(self, N, epsilon, param__, order=1, rng=None):
         """Computes greeks with finite difference method
 
         Args:
@@ -61,6 +63,8 @@ def greeks_difference_method(self, N, epsilon, param__, order=1):
             epsilon (float): epsilon used in finite diferent method for derivative estimation
             param__ (str): name of parameter to which we compute greek
             order (int, optional): order of derivative. Defaults to 1.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
 
         Raises:
             NotImplementedError: not implemented yet
@@ -79,13 +83,15 @@ def greeks_exact(self):
 
 
     @abc.abstractmethod
-    def greeks_malliavin(self, N, param__, order):
+    def greeks_malliavin(self, N, param__, order, rng=None):
         """Computes greeks using Malliavin Calculus
 
         Args:
             N (int): number of iterations for MC
             param__ (str): name of parameter to which we compute our derivative (greek)
             order (int): order of derivative
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
 
         Raises:
             NotImplementedError: not implemented error
@@ -0,0 +1,146 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                             File Name: analytic.py                             #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                       closed-form Black & Scholes greeks                       #
+##################################################################################
+
+############
+# packages #
+############
+
+from scipy.special import ndtr
+import numpy as np
+
+
+###########################
+# Black & Scholes helpers #
+###########################
+
+
+def black_scholes_d1_d2(S, K, r, sigma, T):
+    """Computes classical black scholes parameters commonly noted d1,d2
+
+    All arguments are floats or numpy arrays broadcasting against each other.
+
+    Args:
+        S (float or np.ndarray): price of the underlying at t=0
+        K (float or np.ndarray): strike
+        r (float or np.ndarray): interest rate
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity in years
+
+    Returns:
+        (np.ndarray,np.ndarray): black scholes parameters d1 and d2
+    """
+    sigma_sqrt_T = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / sigma_sqrt_T
+    return d1, d1 - sigma_sqrt_T
+
+
+def normal_density(x):
+    """Density of the standard normal distribution
+
+    Args:
+        x (float or np.ndarray): points of evaluation
+
+    Returns:
+        np.ndarray: standard normal density at x
+    """
+    return np.exp(-0.5 * x ** 2) / np.sqrt(2 * np.pi)
+
+
+######################
+# Closed-form greeks #
+######################
+
+
+def call_greeks(S, K, r, sigma, T):
+    """Exact price, first and second order greeks, speed and rho of european calls
+
+    Args:
+        S (float or np.ndarray): price of the underlying at t=0
+        K (float or np.ndarray): strike
+        r (float or np.ndarray): interest rate
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity in years
+
+    Returns:
+        dict: arrays of "price", "delta", "gamma", "vega", "vanna", "volga", "speed" and "rho"
+    """
+    d1, d2 = black_scholes_d1_d2(S, K, r, sigma, T)
+    density = normal_density(d1)
+    sqrt_T = np.sqrt(T)
+    gamma = density / (S * sigma * sqrt_T)
+    vega = S * density * sqrt_T
+
+    return {
+        "price": S * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2),
+        "delta": ndtr(d1),
+        "gamma": gamma,
+        "vega": vega,
+        "vanna": -density * d2 / sigma,
+        "volga": vega * d1 * d2 / sigma,
+        "speed": -gamma / S * (d1 / (sigma * sqrt_T) + 1),
+        "rho": K * T * np.exp(-r * T) * ndtr(d2),
+    }
+
+
+def digital_greeks(S, K, r, sigma, T):
+    """Exact price, delta, gamma and vega of digital (cash-or-nothing) options paying 1
+
+    Args:
+        S (float or np.ndarray): price of the underlying at t=0
+        K (float or np.ndarray): strike
+        r (float or np.ndarray): interest rate
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity in years
+
+    Returns:
+        dict: arrays of "price", "delta", "gamma" and "vega"
+    """
+    d1, d2 = black_scholes_d1_d2(S, K, r, sigma, T)
+    discounted_density = np.exp(-r * T) * normal_density(d2)
+    sigma_sqrt_T = sigma * np.sqrt(T)
+
+    return {
+        "price": np.exp(-r * T) * ndtr(d2),
+        "delta": discounted_density / (S * sigma_sqrt_T),
+        "gamma": -discounted_density * d1 / (S * sigma_sqrt_T) ** 2,
+        "vega": -discounted_density * d1 / sigma,
+    }
+
+
+def corridor_greeks(S, K1, K2, r, sigma, T):
+    """Exact price, delta, gamma and vega of corridor options paying 1 on [K1, K2]
+
+    A corridor is a long digital struck at K1 and a short digital struck at K2.
+
+    Args:
+        S (float or np.ndarray): price of the underlying at t=0
+        K1 (float or np.ndarray): lower bound of the corridor
+        K2 (float or np.ndarray): upper bound of the corridor
+        r (float or np.ndarray): interest rate
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity in years
+
+    Returns:
+        dict: arrays of "price", "delta", "gamma" and "vega"
+    """
+    lower = digital_greeks(S, K1, r, sigma, T)
+    upper = digital_greeks(S, K2, r, sigma, T)
+
+    return {greek: lower[greek] - upper[greek] for greek in lower}
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,116 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                           File Name: asian_option.py                           #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                          Arithmetic asian call class                           #
+##################################################################################
+
+############
+# packages #
+############
+
+from path_derivative import PathDerivative
+import numpy as np
+import datetime
+
+
+##########
+# payoff #
+##########
+
+
+def asian_call_payoff(path, K):
+    """Vectorized payoff of an arithmetic average asian call
+
+    Args:
+        path (dict): running statistics of the paths, "average" is used
+        K (float): strike
+
+    Returns:
+        np.ndarray: payoff of each path
+    """
+    return np.maximum(path["average"] - K, 0.0)
+
+
+####################
+# Asian Call Class #
+####################
+
+
+class AsianCall(PathDerivative):
+    """Arithmetic average asian call class
+    """
+
+    ###############
+    # Constructor #
+    ###############
+
+    def __init__(self, S0, K, r, sigma, T, n_steps):
+        """Constructor of an asian call
+
+        Args:
+            S0 (float): price of underlying asset at t=0
+            K (float): strike
+            r (float): interest rate
+            sigma (float): volatility
+            T (float): maturity in years
+            n_steps (int): number of averaging dates, uniformly spaced up to T
+        """
+
+        PathDerivative.__init__(self, S0, K, r, sigma, T, n_steps, asian_call_payoff, "asian_call")
+
+
+########
+#-Main-#
+########
+if __name__ == "__main__":
+
+    #####################
+    # General Variables #
+    #####################
+
+    N = 200_000
+    eps_vega, eps_delta, eps_gamma = 0.01, 1, 1
+    rng = np.random.default_rng(0)
+
+    #############################
+    # Defining our asian option #
+    #############################
+
+    T = 1
+    S0 = 100
+    sigma = 0.20
+    r = 0.05
+    K = 100
+    n_steps = 12
+
+    Asian_call = AsianCall(S0, K, r, sigma, T, n_steps)
+
+    ###########################################
+    # Greeks : finite difference vs malliavin #
+    ###########################################
+
+    start_time = datetime.datetime.now()
+
+    malliavin = Asian_call.greeks_malliavin_streaming(N, rng=rng)
+    difference = {
+        "delta": Asian_call.greeks_difference_method(N, eps_delta, "price_0", 1, crn=True, rng=rng),
+        "vega": Asian_call.greeks_difference_method(N, eps_vega, "vol", 1, crn=True, rng=rng),
+        "gamma": Asian_call.greeks_difference_method(N, eps_gamma, "price_0", 2, crn=True, rng=rng),
+    }
+
+    print(f"Monte Carlo simulation overall Time: {datetime.datetime.now() - start_time}")
+    print("*" * 50)
+    print(f"price : {malliavin['price'][0]:.4f} +/- {malliavin['price'][1]:.4f}")
+    for greek, value in difference.items():
+        estimate, std_error = malliavin[greek]
+        print(f"- {greek} : malliavin {estimate:.5f} +/- {std_error:.5f} | finite difference {value:.5f}")
+
+###############
+# end-of-code #
+###############
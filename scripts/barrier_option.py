@@ -0,0 +1,177 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: barrier_option.py                          #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                          Discrete barrier call class                           #
+##################################################################################
+
+############
+# packages #
+############
+
+from path_derivative import PathDerivative
+import numpy as np
+import datetime
+
+
+##########
+# payoff #
+##########
+
+
+def up_and_out_call_payoff(path, K):
+    """Vectorized payoff of a discretely monitored up-and-out call
+
+    Args:
+        path (dict): running statistics of the paths, "terminal" and "max" are used
+        K (tuple): strike and barrier (K, B)
+
+    Returns:
+        np.ndarray: call payoff of the paths that never reached the barrier, 0 elsewhere
+    """
+    K, B = K
+    return np.where(path["max"] < B, np.maximum(path["terminal"] - K, 0.0), 0.0)
+
+
+def down_and_out_call_payoff(path, K):
+    """Vectorized payoff of a discretely monitored down-and-out call
+
+    Args:
+        path (dict): running statistics of the paths, "terminal" and "min" are used
+        K (tuple): strike and barrier (K, B)
+
+    Returns:
+        np.ndarray: call payoff of the paths that never reached the barrier, 0 elsewhere
+    """
+    K, B = K
+    return np.where(path["min"] > B, np.maximum(path["terminal"] - K, 0.0), 0.0)
+
+
+def up_and_in_call_payoff(path, K):
+    """Vectorized payoff of a discretely monitored up-and-in call
+
+    Args:
+        path (dict): running statistics of the paths, "terminal" and "max" are used
+        K (tuple): strike and barrier (K, B)
+
+    Returns:
+        np.ndarray: call payoff of the paths that reached the barrier, 0 elsewhere
+    """
+    K, B = K
+    return np.where(path["max"] >= B, np.maximum(path["terminal"] - K, 0.0), 0.0)
+
+
+def down_and_in_call_payoff(path, K):
+    """Vectorized payoff of a discretely monitored down-and-in call
+
+    Args:
+        path (dict): running statistics of the paths, "terminal" and "min" are used
+        K (tuple): strike and barrier (K, B)
+
+    Returns:
+        np.ndarray: call payoff of the paths that reached the barrier, 0 elsewhere
+    """
+    K, B = K
+    return np.where(path["min"] <= B, np.maximum(path["terminal"] - K, 0.0), 0.0)
+
+
+BARRIER_PAYOFFS = {
+    "up-and-out": up_and_out_call_payoff,
+    "down-and-out": down_and_out_call_payoff,
+    "up-and-in": up_and_in_call_payoff,
+    "down-and-in": down_and_in_call_payoff,
+}
+
+
+######################
+# Barrier Call Class #
+######################
+
+
+class BarrierCall(PathDerivative):
+    """Discretely monitored barrier call class
+    """
+
+    ###############
+    # Constructor #
+    ###############
+
+    def __init__(self, S0, K, B, r, sigma, T, n_steps, kind="up-and-out"):
+        """Constructor of a barrier call
+
+        Args:
+            S0 (float): price of underlying asset at t=0
+            K (float): strike
+            B (float): barrier
+            r (float): interest rate
+            sigma (float): volatility
+            T (float): maturity in years
+            n_steps (int): number of monitoring dates, uniformly spaced up to T
+            kind (str, optional): "up-and-out", "down-and-out", "up-and-in" or "down-and-in".
+                                  Defaults to "up-and-out".
+
+        Raises:
+            Exception: kind should be in BARRIER_PAYOFFS
+        """
+        if kind not in BARRIER_PAYOFFS:
+            raise Exception(f"Invalid kind {kind} not in {list(BARRIER_PAYOFFS)}")
+
+        PathDerivative.__init__(
+            self, S0, (K, B), r, sigma, T, n_steps, BARRIER_PAYOFFS[kind], f"{kind}_call"
+        )
+
+
+########
+#-Main-#
+########
+if __name__ == "__main__":
+
+    #####################
+    # General Variables #
+    #####################
+
+    N = 200_000
+    eps_vega, eps_delta, eps_gamma = 0.01, 1, 1
+    rng = np.random.default_rng(0)
+
+    ###############################
+    # Defining our barrier option #
+    ###############################
+
+    T = 1
+    S0 = 100
+    sigma = 0.20
+    r = 0.05
+    K, B = 100, 130
+    n_steps = 52
+
+    Barrier_call = BarrierCall(S0, K, B, r, sigma, T, n_steps, "up-and-out")
+
+    ###########################################
+    # Greeks : finite difference vs malliavin #
+    ###########################################
+
+    start_time = datetime.datetime.now()
+
+    malliavin = Barrier_call.greeks_malliavin_streaming(N, rng=rng)
+    difference = {
+        "delta": Barrier_call.greeks_difference_method(N, eps_delta, "price_0", 1, crn=True, rng=rng),
+        "vega": Barrier_call.greeks_difference_method(N, eps_vega, "vol", 1, crn=True, rng=rng),
+        "gamma": Barrier_call.greeks_difference_method(N, eps_gamma, "price_0", 2, crn=True, rng=rng),
+    }
+
+    print(f"Monte Carlo simulation overall Time: {datetime.datetime.now() - start_time}")
+    print("*" * 50)
+    print(f"price : {malliavin['price'][0]:.4f} +/- {malliavin['price'][1]:.4f}")
+    for greek, value in difference.items():
+        estimate, std_error = malliavin[greek]
+        print(f"- {greek} : malliavin {estimate:.5f} +/- {std_error:.5f} | finite difference {value:.5f}")
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,356 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                        File Name: basket_derivative.py                         #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                     multi-asset european derivative class                      #
+##################################################################################
+
+############
+# packages #
+############
+
+from abstract_derivative import Derivative
+from european_derivative import draw_normals
+from instrumentation import instrumented, stage
+from scipy.linalg import solve_triangular
+import numpy as np
+
+
+###########################
+# Basket Derivative Class #
+###########################
+
+
+class BasketDerivative(Derivative):
+    """European derivatives on several correlated Black&Scholes assets
+
+    log S_T^i = log S0_i + (r - sigma_i**2/2) T + sigma_i sqrt(T) (L Z)_i with L the
+    Cholesky factor of the correlation matrix and Z a vector of independent
+    normals. With s = L^{-T} Z / (sigma sqrt(T)) (componentwise) the Malliavin
+    weights of the delta vector and of the gamma matrix are
+    s_i / S0_i and (s_i s_j - (Sigma^{-1})_ij - delta_ij s_i) / (S0_i S0_j), where
+    Sigma = T diag(sigma) rho diag(sigma), so one sample gives all d deltas and
+    d(d+1)/2 gammas instead of 2d+1 bumped simulations.
+    """
+
+    #################
+    # Class Builder #
+    #################
+
+    def __init__(self, S0, K, r, sigma, correlation, T, payoff, name):
+        """Constructor of basket derivative
+
+        Args:
+            S0 (array-like): prices of the d assets at t=0
+            K (float or tuple): strike, or tuple of contract parameters (e.g. weights, strike)
+            r (float): interest rate
+            sigma (array-like): volatilities of the d assets
+            correlation (array-like): (d,d) correlation matrix of the assets
+            T (float): maturity
+            payoff (function): vectorized payoff of the option, called as payoff(S_T, K) with
+                               S_T a (d, N) array of terminal prices, one column per path
+            name (str): name of the option
+        """
+        self.name = "_".join(["basket", name])
+        self.params = {
+            "price_0": np.asarray(S0, dtype=np.float64),
+            "strike": K,
+            "interest_rate": r,
+            "vol": np.asarray(sigma, dtype=np.float64),
+            "correlation": np.asarray(correlation, dtype=np.float64),
+            "maturity": T,
+        }
+        self.payoff = payoff
+        self.__factors = (None, None, None)
+
+    def _cholesky(self):
+        """Cholesky factor of the correlation matrix and its inverse transpose, cached
+
+        The factors are recomputed only when params["correlation"] changes.
+
+        Returns:
+            (np.ndarray,np.ndarray): L with L L^T = correlation, and L^{-T}
+        """
+        correlation, L, L_inv_T = self.__factors
+        if correlation is None or not np.array_equal(correlation, self.params["correlation"]):
+            correlation = self.params["correlation"].copy()
+            L = np.linalg.cholesky(correlation)
+            L_inv_T = solve_triangular(L, np.eye(len(L)), lower=True).T
+            self.__factors = (correlation, L, L_inv_T)
+
+        return L, L_inv_T
+
+    ###################
+    # Path simulation #
+    ###################
+
+    def _correlated_normals(self, N, rng=None, dtype=np.float64):
+        """Draws a batch of independent normals and correlates them
+
+        Args:
+            N (int): number of paths
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            (np.ndarray,np.ndarray): independent normals Z and correlated normals L Z,
+                                     both of shape (d, N)
+        """
+        L, _ = self._cholesky()
+        Z = draw_normals((len(L), N), rng, dtype=dtype)
+        with stage("correlate") as recorder:
+            return Z, recorder.track(L.astype(Z.dtype, copy=False) @ Z)
+
+    def _terminal_price(self, X, params__):
+        """Simulates the assets at maturity under Black&Scholes assumptions
+
+        Args:
+            X (np.ndarray): correlated standard normals of shape (d, N)
+            params__ (dict): model parameters, same keys as self.params
+
+        Returns:
+            np.ndarray: terminal prices S_T of shape (d, N)
+        """
+        S0, r, sigma, T = (
+            params__["price_0"][:, None],
+            params__["interest_rate"],
+            params__["vol"][:, None],
+            params__["maturity"],
+        )
+        with stage("exp") as recorder:
+            return recorder.track(
+                (S0 * np.exp((r - sigma ** 2 / 2) * T + sigma * T ** 0.5 * X)).astype(
+                    X.dtype, copy=False
+                )
+            )
+
+    def _discounted_payoff(self, X, params__):
+        """Discounted payoff of each path
+
+        Args:
+            X (np.ndarray): correlated standard normals of shape (d, N)
+            params__ (dict): model parameters, same keys as self.params
+
+        Returns:
+            np.ndarray: discounted payoffs of shape (N,)
+        """
+        S_T = self._terminal_price(X, params__)
+        with stage("payoff") as recorder:
+            payoff = recorder.track(self.payoff(S_T, params__["strike"]))
+
+        return np.exp(-params__["interest_rate"] * params__["maturity"]) * payoff
+
+    ######################
+    # Monte-Carlo pricer #
+    ######################
+
+    @instrumented
+    def price_monte_carlo(
+        self, N, epsilon=0, param__=None, rng=None, batch_size=2 ** 16, dtype=np.float64
+    ):
+        """Prices derivative under Black&Scholes assumptions
+
+        Args:
+            N (int): number of Monte Carlo simulations
+            epsilon (float or np.ndarray, optional): offset of param__, an array offsets each
+                                                     asset separately. Defaults to 0.
+            param__ (str, optional): parameter of the model to offset with epsilon if
+                                     different than None. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            batch_size (int, optional): number of paths simulated per batch. Defaults to 2**16.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            float : price of the derivative
+        """
+        params__ = self.params.copy()
+        if param__:
+            params__[param__] = self.params[param__] + epsilon
+
+        total, remaining = 0.0, N
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            _, X = self._correlated_normals(size, rng, dtype)
+            total += self._discounted_payoff(X, params__).sum(dtype=np.float64)
+            remaining -= size
+
+        return total / N
+
+    ########################################
+    # Greeks with finite difference method #
+    ########################################
+
+    @instrumented
+    def greeks_difference_method(
+        self,
+        N,
+        epsilon,
+        param__,
+        order=1,
+        crn=False,
+        rng=None,
+        batch_size=2 ** 16,
+        dtype=np.float64,
+    ):
+        """Computes the greeks of every asset with finite difference method
+
+        Each asset is bumped separately, which costs 2d+1 prices.
+
+        Args:
+            N (int): number of iterations
+            epsilon (float): bump of each asset's parameter
+            param__ (str): "price_0" or "vol"
+            order (int, optional): order of derivative in [1,2], order 2 gives the diagonal
+                                   of the second derivatives. Defaults to 1.
+            crn (bool, optional): if True, every bumped price is computed on the same normal
+                                  draws (common random numbers). Defaults to False.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            batch_size (int, optional): number of paths simulated per batch. Defaults to 2**16.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: order should be in [1,2]
+
+        Returns:
+            np.ndarray: greek of each asset, of shape (d,)
+        """
+        if order not in [1, 2]:
+            raise Exception(f"Invalid order {order} not in [1,2]")
+
+        d = len(self.params["price_0"])
+        bumps = [np.zeros(d)]
+        for i in range(d):
+            bumps += [epsilon * np.eye(d)[i], -epsilon * np.eye(d)[i]]
+
+        if crn:
+            prices, remaining = np.zeros(len(bumps)), N
+            while remaining > 0:
+                size = min(batch_size, remaining)
+                _, X = self._correlated_normals(size, rng, dtype)
+                for k, bump in enumerate(bumps):
+                    params__ = dict(self.params, **{param__: self.params[param__] + bump})
+                    prices[k] += self._discounted_payoff(X, params__).sum(dtype=np.float64)
+                remaining -= size
+            prices /= N
+        else:
+            prices = np.array([
+                self.price_monte_carlo(N, bump, param__, rng, batch_size, dtype) for bump in bumps
+            ])
+
+        up, down = prices[1::2], prices[2::2]
+        if order == 1:
+            return (up - down) / (epsilon * 2)
+        return (up + down - 2 * prices[0]) / (epsilon ** 2)
+
+    ##########################
+    # Exact values of greeks #
+    ##########################
+
+    def greeks_exact(self):
+        """Computes exact values of the greeks for the derivative
+
+        Raises:
+            Exception: no formula is available !
+        """
+        raise Exception("No exact formula is available !")
+
+    #############################
+    # Malliavin Calculus greeks #
+    #############################
+
+    @instrumented
+    def greeks_malliavin_all(self, N, rng=None, batch_size=2 ** 16, dtype=np.float64):
+        """Price, delta vector and gamma matrix with Malliavin Calculus from one sample
+
+        The sample is simulated by batches of correlated normals. For each batch the
+        delta sums are a (d,N) x (N,) product and the gamma sums a (d,N) x (N,d)
+        product of the payoff-weighted scores with the scores, so no (d,d,N) array
+        is ever built. Sums are accumulated in float64.
+
+        Args:
+            N (int): number of iterations for MC
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            batch_size (int, optional): number of paths simulated per batch. Defaults to 2**16.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: "price" (float), "delta" (array of shape (d,)) and "gamma" (array of
+                  shape (d,d))
+        """
+        S0, sigma, T = self.params["price_0"], self.params["vol"], self.params["maturity"]
+        _, L_inv_T = self._cholesky()
+        d = len(S0)
+        scale = (1 / (sigma * T ** 0.5))[:, None]
+        # inverse covariance of the log returns, Sigma^{-1} = diag(scale) rho^{-1} diag(scale)
+        inverse_covariance = scale * (L_inv_T @ L_inv_T.T) * scale.T
+
+        price, first, second, remaining = 0.0, np.zeros(d), np.zeros((d, d)), N
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            Z, X = self._correlated_normals(size, rng, dtype)
+            discounted_payoff = self._discounted_payoff(X, self.params)
+            with stage("weights") as recorder:
+                scores = recorder.track((L_inv_T.astype(Z.dtype, copy=False) @ Z) * scale)
+                weighted = scores * discounted_payoff
+                price += discounted_payoff.sum(dtype=np.float64)
+                first += weighted.sum(axis=-1, dtype=np.float64)
+                second += weighted.astype(np.float64, copy=False) @ scores.T.astype(
+                    np.float64, copy=False
+                )
+            remaining -= size
+
+        price, first, second = price / N, first / N, second / N
+        gamma = second - price * inverse_covariance - np.diag(first)
+
+        return {
+            "price": price,
+            "delta": first / S0,
+            "gamma": gamma / np.outer(S0, S0),
+        }
+
+    @instrumented
+    def greeks_malliavin(self, N, param__, order, rng=None, batch_size=2 ** 16, dtype=np.float64):
+        """Computes greeks using Malliavin Calculus
+
+        Args:
+            N (int): number of iterations for MC
+            param__ (str): "price_0"
+            order (int): 1 for the delta vector, 2 for the gamma matrix
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            batch_size (int, optional): number of paths simulated per batch. Defaults to 2**16.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: param__ should be "price_0" and order in [1,2]
+
+        Returns:
+            np.ndarray: delta vector of shape (d,) or gamma matrix of shape (d,d)
+        """
+        if param__ != "price_0" or order not in [1, 2]:
+            raise Exception("Only param__='price_0' with order in [1,2] is available")
+
+        greeks = self.greeks_malliavin_all(N, rng, batch_size, dtype)
+        return greeks["delta"] if order == 1 else greeks["gamma"]
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,168 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: basket_option.py                           #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                         Basket and spread call classes                         #
+##################################################################################
+
+############
+# packages #
+############
+
+from basket_derivative import BasketDerivative
+import numpy as np
+import datetime
+
+
+##########
+# payoff #
+##########
+
+
+def basket_call_payoff(x, K):
+    """Vectorized payoff of a call on a weighted basket
+
+    Args:
+        x (np.ndarray): terminal prices of the assets, of shape (d, N)
+        K (tuple): weights of the assets and strike (weights, K)
+
+    Returns:
+        np.ndarray: payoff for each path
+    """
+    weights, K = K
+    return np.maximum(np.asarray(weights, dtype=x.dtype) @ x - K, 0.0)
+
+
+def spread_call_payoff(x, K):
+    """Vectorized payoff of a call on the spread between two assets
+
+    Args:
+        x (np.ndarray): terminal prices of the two assets, of shape (2, N)
+        K (float): strike
+
+    Returns:
+        np.ndarray: payoff for each path
+    """
+    return np.maximum(x[0] - x[1] - K, 0.0)
+
+
+#####################
+# Basket Call Class #
+#####################
+
+
+class BasketCall(BasketDerivative):
+    """European call on a weighted basket
+    """
+
+    ###############
+    # Constructor #
+    ###############
+
+    def __init__(self, S0, weights, K, r, sigma, correlation, T):
+        """Constructor of a basket call
+
+        Args:
+            S0 (array-like): prices of the d assets at t=0
+            weights (array-like): weights of the assets in the basket
+            K (float): strike
+            r (float): interest rate
+            sigma (array-like): volatilities of the d assets
+            correlation (array-like): (d,d) correlation matrix of the assets
+            T (float): maturity in years
+        """
+        BasketDerivative.__init__(
+            self, S0, (tuple(weights), K), r, sigma, correlation, T, basket_call_payoff, "call"
+        )
+
+
+class SpreadCall(BasketDerivative):
+    """European call on the spread S^1 - S^2 of two assets
+    """
+
+    ###############
+    # Constructor #
+    ###############
+
+    def __init__(self, S0, K, r, sigma, correlation, T):
+        """Constructor of a spread call
+
+        Args:
+            S0 (array-like): prices of the two assets at t=0
+            K (float): strike
+            r (float): interest rate
+            sigma (array-like): volatilities of the two assets
+            correlation (float): correlation between the two assets
+            T (float): maturity in years
+        """
+        BasketDerivative.__init__(
+            self,
+            S0,
+            K,
+            r,
+            sigma,
+            [[1.0, correlation], [correlation, 1.0]],
+            T,
+            spread_call_payoff,
+            "spread_call",
+        )
+
+
+########
+#-Main-#
+########
+if __name__ == "__main__":
+
+    #####################
+    # General Variables #
+    #####################
+
+    N = 1_000_000
+    eps_delta, eps_gamma = 1, 2
+    rng = np.random.default_rng(0)
+
+    ############################
+    # Defining our basket call #
+    ############################
+
+    d = 20
+    T = 1
+    r = 0.05
+    S0 = np.full(d, 100.0)
+    sigma = np.linspace(0.15, 0.35, d)
+    correlation = np.full((d, d), 0.5) + 0.5 * np.eye(d)
+    weights = np.full(d, 1 / d)
+    K = 100
+
+    Basket_call = BasketCall(S0, weights, K, r, sigma, correlation, T)
+
+    ###########################################
+    # Greeks : finite difference vs malliavin #
+    ###########################################
+
+    start_time = datetime.datetime.now()
+    malliavin = Basket_call.greeks_malliavin_all(N, rng=rng)
+    malliavin_time = datetime.datetime.now() - start_time
+
+    start_time = datetime.datetime.now()
+    DELTA_epsilon = Basket_call.greeks_difference_method(N, eps_delta, "price_0", 1, crn=True, rng=rng)
+    GAMMA_epsilon = Basket_call.greeks_difference_method(N, eps_gamma, "price_0", 2, crn=True, rng=rng)
+    difference_time = datetime.datetime.now() - start_time
+
+    print(f"malliavin (delta vector and gamma matrix) : {malliavin_time}")
+    print(f"finite difference (delta and gamma diagonal) : {difference_time}")
+    print("*" * 50)
+    print(f"price : {malliavin['price']:.4f}")
+    print(f"- delta malliavin : {np.round(malliavin['delta'], 4)}")
+    print(f"- delta finite difference : {np.round(DELTA_epsilon, 4)}")
+    print(f"- gamma diagonal malliavin : {np.round(np.diag(malliavin['gamma']), 5)}")
+    print(f"- gamma diagonal finite difference : {np.round(GAMMA_epsilon, 5)}")
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,578 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                           File Name: batch_runner.py                           #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                     headless batch pricer of option books                      #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_call import EuropeanCall
+from digital_option import DigitalOption
+from corridor_option import CorridorOption
+from analytic import call_greeks, digital_greeks, corridor_greeks
+from portfolio import check_contract, price_contracts, strike_column
+from instrumentation import merge_worker_stats, profiled_call, profiling
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import argparse
+import csv
+import datetime
+import functools
+import itertools
+import json
+import os
+import zipfile
+
+
+############
+# Products #
+############
+
+# product class and closed-form greeks of each option type
+PRODUCTS = {
+    "call": (EuropeanCall, call_greeks),
+    "digital": (DigitalOption, digital_greeks),
+    "corridor": (CorridorOption, corridor_greeks),
+}
+
+METHODS = ["malliavin", "difference", "exact"]
+
+GREEKS = ["price", "delta", "vega", "gamma"]
+
+RESULT_DTYPE = np.dtype(
+    [("index", np.int64), ("type", "U8"), ("method", "U10"), ("N", np.int64)]
+    + [(greek, np.float64) for greek in GREEKS]
+    + [(f"{greek}_se", np.float64) for greek in GREEKS]
+)
+
+
+###############
+# Input specs #
+###############
+
+
+def read_records(path, fmt=None):
+    """Streams the raw records of a file of option specs, one at a time
+
+    Args:
+        path (str): csv or newline-delimited json file
+        fmt (str, optional): "csv" or "ndjson", guessed from the extension if None.
+                             Defaults to None.
+
+    Raises:
+        Exception: fmt should be in ["csv", "ndjson"]
+
+    Yields:
+        dict: fields of one record
+    """
+    if fmt is None:
+        fmt = "csv" if path.endswith(".csv") else "ndjson"
+    if fmt not in ["csv", "ndjson"]:
+        raise Exception(f"Invalid format {fmt} not in ['csv','ndjson']")
+
+    with open(path, newline="") as file:
+        if fmt == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def parse_spec(record, index, N=100_000, method="malliavin"):
+    """Validates one record and maps it to the parameters of EuropeanDerivative
+
+    Args:
+        record (dict): fields type, S0, K (or K1 and K2 for corridors), r, sigma, T and
+                       optionally method and N
+        index (int): position of the record in the input
+        N (int, optional): number of iterations for MC if the record has none.
+                           Defaults to 100_000.
+        method (str, optional): method if the record has none. Defaults to "malliavin".
+
+    Raises:
+        Exception: fields should be present and numbers where expected
+        Exception: type should be in PRODUCTS
+        Exception: method should be in METHODS
+        Exception: N should be positive
+        Exception: S0, strikes, sigma and T should be positive and every value finite
+
+    Returns:
+        dict: index, type, method, N and the contract (same keys as EuropeanDerivative.params)
+    """
+    try:
+        product = record["type"].strip().lower()
+        method = (record.get("method") or method).strip().lower()
+        if product == "corridor":
+            strike = (float(record["K1"]), float(record["K2"]))
+        else:
+            strike = float(record["K"])
+        N = int(float(record.get("N") or N))
+        contract = {
+            "price_0": float(record["S0"]),
+            "strike": strike,
+            "interest_rate": float(record["r"]),
+            "vol": float(record["sigma"]),
+            "maturity": float(record["T"]),
+        }
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise Exception(f"Invalid record {index}, missing or malformed field: {error}")
+
+    if product not in PRODUCTS:
+        raise Exception(f"Invalid type {product} at record {index} not in {list(PRODUCTS)}")
+    if method not in METHODS:
+        raise Exception(f"Invalid method {method} at record {index} not in {METHODS}")
+    if N <= 0:
+        raise Exception(f"Invalid N {N} at record {index}, should be positive")
+    try:
+        check_contract(contract)
+    except Exception as error:
+        raise Exception(f"{error} at record {index}")
+
+    return {"index": index, "type": product, "method": method, "N": N, "contract": contract}
+
+
+def groups(specs, group_size):
+    """Splits a chunk of specs into vectorized groups of the same type, method and N
+
+    Args:
+        specs (list of dict): parsed specs, see parse_spec
+        group_size (int): maximal number of contracts in a group
+
+    Returns:
+        list of (str,str,int,list of dict): type, method, N and specs of each group
+    """
+    by_key = {}
+    for spec in specs:
+        by_key.setdefault((spec["type"], spec["method"], spec["N"]), []).append(spec)
+
+    return [
+        key + (members[start : start + group_size],)
+        for key, members in by_key.items()
+        for start in range(0, len(members), group_size)
+    ]
+
+
+###################
+# Group estimates #
+###################
+
+
+def _template(product, contract):
+    """Derivative of a given type whose params are those of a contract
+
+    Args:
+        product (str): option type, a key of PRODUCTS
+        contract (dict): same keys as EuropeanDerivative.params
+
+    Returns:
+        EuropeanDerivative: template of the group
+    """
+    strike = contract["strike"]
+    strike = tuple(strike) if product == "corridor" else (strike,)
+    return PRODUCTS[product][0](
+        contract["price_0"],
+        *strike,
+        contract["interest_rate"],
+        contract["vol"],
+        contract["maturity"],
+    )
+
+
+def _difference_estimates(template, contracts, N, bump, batch_size, rng, dtype):
+    """Central finite difference greeks of several contracts on one shared sample
+
+    Every contract is stacked with its four bumped scenarios (price_0 and vol up
+    and down by bump times their value), all priced on the same draws so the
+    differences use common random numbers.
+
+    Args:
+        template (EuropeanDerivative): derivative giving the payoff
+        contracts (list of dict): same keys as EuropeanDerivative.params
+        N (int): number of iterations for MC
+        bump (float): relative bump of price_0 and vol
+        batch_size (int): number of paths simulated per block
+        rng (np.random.Generator): source of normal draws
+        dtype (np.dtype): precision of the simulated paths, see draw_normals
+
+    Returns:
+        dict: (estimate, standard error) arrays of "price", "delta", "vega" and "gamma"
+    """
+    params__ = {
+        key: np.array([contract[key] for contract in contracts], dtype=dtype)[:, None]
+        for key in ["price_0", "interest_rate", "vol", "maturity"]
+    }
+    params__["strike"] = strike_column([contract["strike"] for contract in contracts], dtype)
+    h_spot, h_vol = bump * params__["price_0"], bump * params__["vol"]
+
+    # scenarios along the first axis: base, spot up, spot down, vol up, vol down
+    params__["price_0"] = params__["price_0"] + np.array([0, 1, -1, 0, 0])[:, None, None] * h_spot
+    params__["vol"] = params__["vol"] + np.array([0, 0, 0, 1, -1])[:, None, None] * h_vol
+    discount = np.exp(-params__["interest_rate"] * params__["maturity"])
+
+    def sampler(G):
+        prices = discount * template._evaluate_payoff(
+            template._terminal_price(G, params__), params__["strike"]
+        )
+        return {
+            "price": prices[0],
+            "delta": (prices[1] - prices[2]) / (2 * h_spot),
+            "vega": (prices[3] - prices[4]) / (2 * h_vol),
+            "gamma": (prices[1] + prices[2] - 2 * prices[0]) / h_spot ** 2,
+        }
+
+    return template._stream(N, sampler, max(batch_size // 5, 1), rng, dtype).result()
+
+
+def price_group(product, method, N, specs, seed, batch_size=2 ** 12, bump=0.01, dtype=np.float64):
+    """Prices a group of contracts of the same type with one vectorized estimator
+
+    Args:
+        product (str): option type, a key of PRODUCTS
+        method (str): "malliavin", "difference" (common random numbers) or "exact"
+        N (int): number of iterations for MC, shared by the group
+        specs (list of dict): parsed specs of the group, see parse_spec
+        seed (np.random.SeedSequence): seed of the group's random stream
+        batch_size (int, optional): number of paths simulated per block. Defaults to 2**12.
+        bump (float, optional): relative bump of the finite differences. Defaults to 0.01.
+        dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                    Defaults to np.float64.
+
+    Returns:
+        np.ndarray: one RESULT_DTYPE record per spec, standard errors are nan for "exact"
+    """
+    contracts = [spec["contract"] for spec in specs]
+    records = np.zeros(len(specs), dtype=RESULT_DTYPE)
+    records["index"] = [spec["index"] for spec in specs]
+    records["type"], records["method"], records["N"] = product, method, N
+
+    if method == "exact":
+        arguments = [
+            np.array([contract[key] for contract in contracts])
+            for key in ["price_0", "strike", "interest_rate", "vol", "maturity"]
+        ]
+        if product == "corridor":
+            arguments[1:2] = arguments[1].T
+        exact = PRODUCTS[product][1](*arguments)
+        for greek in GREEKS:
+            records[greek] = exact[greek]
+            records[f"{greek}_se"] = np.nan
+        return records
+
+    template = _template(product, contracts[0])
+    rng = np.random.default_rng(seed)
+    if method == "malliavin":
+        results = price_contracts(template, contracts, N, batch_size, rng, dtype)
+        estimates = {
+            greek: tuple(np.array([result[greek][i] for result in results]) for i in [0, 1])
+            for greek in GREEKS
+        }
+    else:
+        estimates = _difference_estimates(template, contracts, N, bump, batch_size, rng, dtype)
+
+    for greek in GREEKS:
+        records[greek], records[f"{greek}_se"] = estimates[greek]
+
+    return records
+
+
+def _price_group_task(task):
+    """Unpacks the arguments of price_group, used by the worker pool
+
+    Args:
+        task (tuple): arguments of price_group
+
+    Returns:
+        np.ndarray: records of the group
+    """
+    return price_group(*task)
+
+
+##################
+# Output writers #
+##################
+
+
+class CsvWriter:
+    """Appends result records to a csv file
+    """
+
+    def __init__(self, path):
+        """Opens the file and writes the header
+
+        Args:
+            path (str): csv file
+        """
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(RESULT_DTYPE.names)
+
+    def write(self, records):
+        """Appends records
+
+        Args:
+            records (np.ndarray): RESULT_DTYPE records
+        """
+        self.writer.writerows(records.tolist())
+
+    def close(self):
+        """Closes the file
+        """
+        self.file.close()
+
+
+class NpyWriter:
+    """Appends result records to a .npy file whose header is completed on close
+
+    The header is padded to the length of the largest possible shape, so the
+    final shape fits in it without moving the data already written.
+    """
+
+    def __init__(self, path):
+        """Opens the file and reserves the header
+
+        Args:
+            path (str): .npy file
+        """
+        self.file = open(path, "wb")
+        # magic string, header length, header of the largest shape and newline, 64 aligned
+        self.header_length = -(-(10 + len(self.__header(np.iinfo(np.int64).max)) + 1) // 64) * 64
+        self.count = 0
+        self.__write_header()
+
+    def __header(self, count):
+        """Header dictionary of the .npy format
+
+        Args:
+            count (int): number of records
+
+        Returns:
+            str: header describing count RESULT_DTYPE records
+        """
+        return repr(
+            {
+                "descr": np.lib.format.dtype_to_descr(RESULT_DTYPE),
+                "fortran_order": False,
+                "shape": (count,),
+            }
+        )
+
+    def __write_header(self):
+        """Writes the version 1.0 header of the current number of records
+        """
+        header = self.__header(self.count)
+        padding = self.header_length - 10 - len(header) - 1
+        self.file.seek(0)
+        self.file.write(np.lib.format.magic(1, 0))
+        self.file.write(np.uint16(self.header_length - 10).tobytes())
+        self.file.write((header + " " * padding + "\n").encode("latin1"))
+        self.file.seek(0, os.SEEK_END)
+
+    def write(self, records):
+        """Appends records
+
+        Args:
+            records (np.ndarray): RESULT_DTYPE records
+        """
+        self.file.write(np.ascontiguousarray(records, dtype=RESULT_DTYPE).tobytes())
+        self.count += len(records)
+
+    def close(self):
+        """Writes the final header and closes the file
+        """
+        self.__write_header()
+        self.file.close()
+
+
+class NpzWriter(NpyWriter):
+    """Appends result records to a temporary .npy file zipped as "results" on close
+    """
+
+    def __init__(self, path):
+        """Opens the temporary file
+
+        Args:
+            path (str): .npz file
+        """
+        self.path = path
+        NpyWriter.__init__(self, path + ".tmp.npy")
+
+    def close(self):
+        """Completes the temporary file, stores it in the archive and removes it
+        """
+        NpyWriter.close(self)
+        with zipfile.ZipFile(self.path, "w", allowZip64=True) as archive:
+            archive.write(self.path + ".tmp.npy", "results.npy")
+        os.remove(self.path + ".tmp.npy")
+
+
+def open_writer(path):
+    """Writer of result records chosen from the extension of the output
+
+    Args:
+        path (str): .csv, .npy or .npz file
+
+    Raises:
+        Exception: the extension should be .csv, .npy or .npz
+
+    Returns:
+        CsvWriter, NpyWriter or NpzWriter: writer with write(records) and close()
+    """
+    for extension, writer in [(".csv", CsvWriter), (".npy", NpyWriter), (".npz", NpzWriter)]:
+        if path.endswith(extension):
+            return writer(path)
+    raise Exception(f"Invalid output {path}, expected a .csv, .npy or .npz file")
+
+
+##############
+# Batch runs #
+##############
+
+
+def run(
+    input_path,
+    output_path,
+    fmt=None,
+    N=100_000,
+    method="malliavin",
+    chunk_size=10_000,
+    group_size=128,
+    batch_size=2 ** 12,
+    bump=0.01,
+    workers=1,
+    seed=0,
+    dtype=np.float64,
+):
+    """Prices a book of option specs chunk by chunk and writes the results incrementally
+
+    Only one chunk of specs and its results are in memory at a time. Inside a
+    chunk contracts are grouped by type, method and N and each group is priced
+    on one shared normal sample. Groups draw from streams spawned from one
+    np.random.SeedSequence in input order, so results do not depend on the
+    number of workers. Results are written in input order. Every record is
+    validated before pricing starts and results go to a temporary file moved
+    onto output_path once complete, so a failed run leaves no partial output.
+
+    Args:
+        input_path (str): csv or newline-delimited json file of specs, see parse_spec
+        output_path (str): .csv, .npy or .npz file of RESULT_DTYPE records
+        fmt (str, optional): "csv" or "ndjson", guessed from the extension if None.
+                             Defaults to None.
+        N (int, optional): number of iterations for MC of specs without N. Defaults to 100_000.
+        method (str, optional): method of specs without method. Defaults to "malliavin".
+        chunk_size (int, optional): number of specs read at once. Defaults to 10_000.
+        group_size (int, optional): maximal number of contracts priced together. Defaults to 128.
+        batch_size (int, optional): number of paths simulated per block. Defaults to 2**12.
+        bump (float, optional): relative bump of the finite differences. Defaults to 0.01.
+        workers (int, optional): number of worker processes, groups are priced in the
+                                 calling process if 1. Defaults to 1.
+        seed (int, optional): root seed of the random streams. Defaults to 0.
+        dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                    Defaults to np.float64.
+
+    Raises:
+        Exception: every record should be valid, see parse_spec
+
+    Returns:
+        int: number of priced specs
+    """
+    # a malformed record fails the run before anything is priced
+    for index, record in enumerate(read_records(input_path, fmt)):
+        parse_spec(record, index, N, method)
+
+    seeds = np.random.SeedSequence(seed)
+    records = read_records(input_path, fmt)
+    root, extension = os.path.splitext(output_path)
+    temp_path = f"{root}.part{extension}"
+    writer = open_writer(temp_path)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    count = 0
+    completed = False
+
+    try:
+        for start in itertools.count(0, chunk_size):
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            specs = [parse_spec(record, start + i, N, method) for i, record in enumerate(chunk)]
+            chunk_groups = groups(specs, group_size)
+            tasks = [
+                (product, method__, N__, members, group_seed, batch_size, bump, dtype)
+                for (product, method__, N__, members), group_seed in zip(
+                    chunk_groups, seeds.spawn(len(chunk_groups))
+                )
+            ]
+            if pool is not None:
+                task = functools.partial(profiled_call, profiling(), _price_group_task)
+                outputs = list(pool.map(task, tasks))
+                for _, estimators in outputs:
+                    merge_worker_stats(estimators)
+                results = np.concatenate([output for output, _ in outputs])
+            else:
+                results = np.concatenate([_price_group_task(task) for task in tasks])
+            writer.write(results[np.argsort(results["index"], kind="stable")])
+            count += len(results)
+        completed = True
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+        if completed:
+            os.replace(temp_path, output_path)
+        else:
+            os.remove(temp_path)
+
+    return count
+
+
+########
+#-Main-#
+########
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Prices a book of option specs (csv or ndjson) into csv, .npy or .npz"
+    )
+    parser.add_argument("input", help="csv or ndjson file of specs")
+    parser.add_argument("output", help=".csv, .npy or .npz file of results")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--N", type=int, default=100_000, help="default number of paths")
+    parser.add_argument("--method", choices=METHODS, default="malliavin", help="default method")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--group-size", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=2 ** 12)
+    parser.add_argument("--bump", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64")
+    args = parser.parse_args()
+
+    start_time = datetime.datetime.now()
+    count = run(
+        args.input,
+        args.output,
+        args.format,
+        args.N,
+        args.method,
+        args.chunk_size,
+        args.group_size,
+        args.batch_size,
+        args.bump,
+        args.workers,
+        args.seed,
+        np.dtype(args.dtype),
+    )
+    print(f"{count} options priced in {datetime.datetime.now() - start_time} -> {args.output}")
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,320 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                            File Name: benchmark.py                             #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                    benchmark of the Monte Carlo estimators                     #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_call import EuropeanCall
+from digital_option import DigitalOption
+from corridor_option import CorridorOption
+from analytic import call_greeks, digital_greeks, corridor_greeks
+from kernels import NUMBA_AVAILABLE
+from portfolio import StrikeMaturityGrid, contract_params
+from running_stats import RunningStats
+import numpy as np
+import argparse
+import datetime
+import json
+import platform
+import time
+import tracemalloc
+
+
+###################
+# Benchmark cases #
+###################
+
+T, S0, sigma, r = 1, 100, 0.2, 0.05
+
+# (product, exact greeks, (eps_vega, eps_delta, eps_gamma)) as in each script's main
+PRODUCTS = {
+    "call": (
+        EuropeanCall(S0, 75, r, sigma, T),
+        call_greeks(S0, 75, r, sigma, T),
+        (0.04, 8, 8),
+    ),
+    "digital": (
+        DigitalOption(S0, 75, r, sigma, T),
+        digital_greeks(S0, 75, r, sigma, T),
+        (0.01, 1, 0.01),
+    ),
+    "corridor": (
+        CorridorOption(S0, 75, 85, r, sigma, T),
+        corridor_greeks(S0, 75, 85, r, sigma, T),
+        (0.01, 1, 0.01),
+    ),
+}
+
+
+def estimators(product, epsilons):
+    """Estimators benchmarked for one product
+
+    Args:
+        product (EuropeanDerivative): priced derivative
+        epsilons (tuple): bumps used for vega, delta and gamma by finite differences
+
+    Returns:
+        list of (str,str,function): name, greek and estimator called as estimator(N, rng)
+    """
+    eps_vega, eps_delta, eps_gamma = epsilons
+    cases = [("price_monte_carlo", "price", lambda N, rng: product.price_monte_carlo(N, rng=rng))]
+
+    for greek, param__, order, epsilon in [
+        ("delta", "price_0", 1, eps_delta),
+        ("vega", "vol", 1, eps_vega),
+        ("gamma", "price_0", 2, eps_gamma),
+    ]:
+        cases += [
+            (
+                "greeks_difference_method",
+                greek,
+                lambda N, rng, p=param__, o=order, e=epsilon: product.greeks_difference_method(
+                    N, e, p, o, rng=rng
+                ),
+            ),
+            (
+                "greeks_difference_method_crn",
+                greek,
+                lambda N, rng, p=param__, o=order, e=epsilon: product.greeks_difference_method(
+                    N, e, p, o, crn=True, rng=rng
+                ),
+            ),
+            (
+                "greeks_malliavin",
+                greek,
+                lambda N, rng, p=param__, o=order: product.greeks_malliavin(N, p, o, rng=rng),
+            ),
+        ]
+        if NUMBA_AVAILABLE:
+            cases.append(
+                (
+                    "greeks_malliavin_numba",
+                    greek,
+                    lambda N, rng, p=param__, o=order: product.greeks_malliavin(
+                        N, p, o, rng=rng, backend="numba"
+                    ),
+                )
+            )
+
+    return cases
+
+
+######################
+# Benchmark one case #
+######################
+
+
+def benchmark_estimator(estimator, N, repeats, seed, exact=None):
+    """Measures runtime, memory and accuracy of an estimator over independent runs
+
+    The estimator is called once before the timed repeats, so that one-off
+    costs such as the JIT compilation of the numba kernels are not timed. The
+    repeats are timed with tracemalloc off, since tracing every allocation
+    slows allocation heavy estimators down. Peak memory is measured by one more,
+    untimed run of the same size.
+
+    Args:
+        estimator (function): called as estimator(N, rng)
+        N (int): number of Monte Carlo paths
+        repeats (int): number of independent runs
+        seed (int): root seed of the runs
+        exact (float, optional): exact value of the estimated quantity. Defaults to None.
+
+    Returns:
+        dict: paths per second, peak memory, variance, efficiency (variance x runtime)
+              and, if exact is given, bias and root mean squared error
+    """
+    runtimes, estimates = [], []
+    estimator(min(N, 1_000), np.random.default_rng([seed, repeats + 1]))
+
+    for i in range(repeats):
+        rng = np.random.default_rng([seed, i])
+        start_time = time.perf_counter()
+        estimates.append(estimator(N, rng))
+        runtimes.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    estimator(N, np.random.default_rng([seed, repeats]))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    estimates = np.array(estimates, dtype=np.float64)
+    runtime = float(np.mean(runtimes))
+    variance = float(estimates.var(ddof=1))
+
+    result = {
+        "N": N,
+        "repeats": repeats,
+        "runtime_seconds": runtime,
+        "paths_per_second": N / runtime,
+        "peak_memory_bytes": int(peak),
+        "mean": float(estimates.mean()),
+        "variance": variance,
+        "efficiency": variance * runtime,
+    }
+    if exact is not None:
+        result["bias"] = float(estimates.mean() - exact)
+        result["rmse"] = float(np.sqrt(((estimates - exact) ** 2).mean()))
+
+    return result
+
+
+def run_benchmarks(sizes, repeats, seed):
+    """Benchmarks every estimator of every product over the path counts
+
+    Args:
+        sizes (list of int): numbers of Monte Carlo paths
+        repeats (int): number of independent runs per measurement
+        seed (int): root seed of the runs
+
+    Returns:
+        list of dict: one record per (product, estimator, greek, N)
+    """
+    records = []
+    for product_name, (product, exact, epsilons) in PRODUCTS.items():
+        for method, greek, estimator in estimators(product, epsilons):
+            for N in sizes:
+                record = {"product": product_name, "method": method, "greek": greek}
+                record.update(
+                    benchmark_estimator(estimator, N, repeats, seed, float(exact[greek]))
+                )
+                records.append(record)
+                print(
+                    f"{product_name:>8} {method:>28} {greek:>5} N={N:<8} "
+                    f"{record['paths_per_second']:.3e} paths/s  "
+                    f"efficiency {record['efficiency']:.3e}"
+                )
+
+    return records
+
+
+###################
+# Precision check #
+###################
+
+
+def precision_check(N, seed, width=1.0):
+    """Compares float32 paths with float64 paths on the same normal draws
+
+    The draws are generated in float64 and rounded to float32, so both runs see
+    the same scenarios and any difference comes from the precision of S_T, the
+    payoffs and the weights alone. It is reported in standard errors of the
+    float64 estimator. The per-path samples of the float32 run, with scalar
+    parameters and with the stacked parameters of the strike / maturity grid
+    and of price_contracts, are first checked to really be float32. Both the
+    Malliavin and the localized Malliavin samples are checked.
+
+    Args:
+        N (int): number of Monte Carlo paths
+        seed (int): seed of the draws
+        width (float, optional): half width of the localization windows. Defaults to 1.0.
+
+    Raises:
+        Exception: float32 paths are promoted to float64
+
+    Returns:
+        list of dict: one record per (product, estimator, greek) with both estimates,
+                      their difference and the difference in standard errors
+    """
+    G = np.random.default_rng(seed).standard_normal(N)
+    records = []
+    for product_name, (product, exact, epsilons) in PRODUCTS.items():
+        samplers = {
+            "malliavin": product._malliavin_samples,
+            "localized": lambda G, params__=None: product._localized_samples(G, width, params__),
+        }
+        strike = product.params["strike"]
+        for estimator, sampler in samplers.items():
+            for params__ in [
+                None,
+                StrikeMaturityGrid(product, [strike, strike], [0.5, 1.0])._params(0.5, np.float32),
+                contract_params(product, [{"strike": strike, "vol": 0.3}, {}], np.float32),
+            ]:
+                for greek, samples in sampler(G.astype(np.float32), params__).items():
+                    if samples.dtype != np.float32:
+                        raise Exception(
+                            f"float32 {estimator} paths of {product_name} {greek} promoted "
+                            f"to {samples.dtype}"
+                        )
+
+            double, single = RunningStats(), RunningStats()
+            double.update(sampler(G))
+            single.update(sampler(G.astype(np.float32)))
+            for greek in double.mean:
+                difference = float(single.mean[greek] - double.mean[greek])
+                records.append(
+                    {
+                        "product": product_name,
+                        "estimator": estimator,
+                        "greek": greek,
+                        "float64": float(double.mean[greek]),
+                        "float32": float(single.mean[greek]),
+                        "difference": difference,
+                        "difference_in_std_errors": difference / float(double.std_error(greek)),
+                    }
+                )
+                print(
+                    f"{product_name:>8} {estimator:>9} {greek:>5} "
+                    f"float64 {double.mean[greek]:.8e} float32 {single.mean[greek]:.8e} "
+                    f"({records[-1]['difference_in_std_errors']:+.1e} std errors)"
+                )
+
+    return records
+
+
+########
+#-Main-#
+########
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark of the Monte Carlo estimators")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument(
+        "--precision-check",
+        action="store_true",
+        help="compare float32 and float64 paths instead of benchmarking",
+    )
+    args = parser.parse_args()
+
+    if args.precision_check:
+        records = precision_check(max(args.sizes), args.seed)
+    else:
+        records = run_benchmarks(args.sizes, args.repeats, args.seed)
+
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "metadata": {
+                    "date": datetime.datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.machine(),
+                    "sizes": args.sizes,
+                    "repeats": args.repeats,
+                    "seed": args.seed,
+                },
+                "results": records,
+            },
+            file,
+            indent=2,
+        )
+
+    print(f"results written to {args.output}")
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,232 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                              File Name: cache.py                               #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                         memoization of greek estimates                         #
+##################################################################################
+
+############
+# packages #
+############
+
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import copy
+import os
+import pickle
+
+
+#############
+# Cache key #
+#############
+
+
+def _canonical(value):
+    """Turns a parameter value into a hashable canonical form
+
+    Args:
+        value (object): number, string, sequence or dict
+
+    Returns:
+        object: hashable value, numbers as floats and containers as tuples
+    """
+    if isinstance(value, np.ndarray) and value.ndim == 0:
+        return _canonical(value.item())
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canonical(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def cache_key(derivative, method, N, seed, **kwargs):
+    """Builds the canonical key of a greek estimate
+
+    Args:
+        derivative (EuropeanDerivative): priced derivative
+        method (str): name of the estimator, e.g. "greeks_malliavin"
+        N (int): number of Monte Carlo paths
+        seed (int): seed of the random generator
+        **kwargs: other arguments of the estimator (param__, order, epsilon, ...)
+
+    Returns:
+        tuple: hashable key identifying the estimate
+    """
+    payoff = derivative.payoff
+    return (
+        type(derivative).__qualname__,
+        f"{payoff.__module__}.{payoff.__qualname__}",
+        _canonical(derivative.params),
+        method,
+        _canonical(kwargs),
+        int(N),
+        int(seed),
+    )
+
+
+#####################
+# Greek cache class #
+#####################
+
+
+class GreekCache:
+    """Memoizes greek estimates of derivatives
+
+    Estimates live in a bounded in-memory LRU and optionally in an on-disk tier
+    (one pickle per key) evicted by least recent use once it exceeds a size
+    budget. Only seeded estimates are cached, since they are reproducible.
+    Callers get their own copy of an estimate, so mutating a result (e.g. a
+    dict of greeks) does not alter the cached one.
+    """
+
+    def __init__(self, maxsize=1024, disk_dir=None, disk_max_bytes=2 ** 28):
+        """Constructor
+
+        Args:
+            maxsize (int, optional): number of estimates kept in memory. Defaults to 1024.
+            disk_dir (str, optional): directory of the on-disk tier, disabled if None. Defaults to None.
+            disk_max_bytes (int, optional): size budget of the on-disk tier. Defaults to 2**28.
+        """
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __disk_path(self, key):
+        """Path of the pickle storing a key on disk
+
+        Args:
+            key (tuple): canonical key
+
+        Returns:
+            str: path of the pickle
+        """
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    def __store_memory(self, key, value):
+        """Stores a value in the LRU, evicting the least recently used ones
+
+        Args:
+            key (tuple): canonical key
+            value (object): estimate
+        """
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def __store_disk(self, key, value):
+        """Stores a value on disk, evicting least recently used files above the budget
+
+        Args:
+            key (tuple): canonical key
+            value (object): estimate
+        """
+        with open(self.__disk_path(key), "wb") as file:
+            pickle.dump((key, value), file)
+
+        entries = [
+            entry for entry in os.scandir(self.disk_dir) if entry.name.endswith(".pkl")
+        ]
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.disk_max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def get(self, key):
+        """Looks a key up in memory, then on disk
+
+        Args:
+            key (tuple): canonical key
+
+        Returns:
+            (bool,object): whether the key was found and the cached estimate
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return True, self.memory[key]
+
+        if self.disk_dir is not None:
+            path = self.__disk_path(key)
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    stored_key, value = pickle.load(file)
+                if stored_key == key:
+                    os.utime(path)
+                    self.__store_memory(key, value)
+                    return True, value
+
+        return False, None
+
+    def put(self, key, value):
+        """Stores an estimate in every tier
+
+        Args:
+            key (tuple): canonical key
+            value (object): estimate
+        """
+        self.__store_memory(key, value)
+        if self.disk_dir is not None:
+            self.__store_disk(key, value)
+
+    def compute(self, derivative, method, N, seed=None, **kwargs):
+        """Returns a cached greek estimate or runs the estimator and caches it
+
+        Args:
+            derivative (EuropeanDerivative): priced derivative
+            method (str): name of an estimator accepting N and rng, e.g. "greeks_malliavin",
+                          "greeks_difference_method" or "greeks_malliavin_all"
+            N (int): number of Monte Carlo paths
+            seed (int, optional): seed of np.random.default_rng, the estimate is not
+                                  cached if None. Defaults to None.
+            **kwargs: other arguments of the estimator (param__, order, epsilon, ...)
+
+        Returns:
+            object: the estimate, a copy of the cached one on a hit
+        """
+        if seed is None:
+            return getattr(derivative, method)(N=N, **kwargs)
+
+        key = cache_key(derivative, method, N, seed, **kwargs)
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return copy.deepcopy(value)
+
+        self.misses += 1
+        value = getattr(derivative, method)(N=N, rng=np.random.default_rng(seed), **kwargs)
+        self.put(key, copy.deepcopy(value))
+
+        return value
+
+    def clear(self):
+        """Empties the in-memory tier and the on-disk tier
+        """
+        self.memory.clear()
+        if self.disk_dir is not None:
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith(".pkl"):
+                    os.remove(entry.path)
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
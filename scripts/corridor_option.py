@@ -15,11 +15,70 @@
 ############
 
 from european_derivative import EuropeanDerivative
+from analytic import corridor_greeks
 import numpy as np
-import matplotlib.pyplot as plt
 import datetime
 
 
+##########
+# payoff #
+##########
+
+
+def corridor_payoff(x, K):
+    """Vectorized payoff of a corridor option
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (tuple): lower and upper bounds (K1, K2) of the corridor
+
+    Returns:
+        np.ndarray: 1 where the terminal price lies in [K1, K2], 0 elsewhere
+    """
+    K1, K2 = K
+    return ((x >= K1) & (x <= K2)).astype(x.dtype)
+
+
+def corridor_payoff_smooth(x, K, width):
+    """Smooth approximation of the corridor payoff used by localized Malliavin estimators
+
+    Both jumps are replaced by linear ramps on [K1 - width, K1 + width] and
+    [K2 - width, K2 + width], so the approximation coincides with the payoff
+    outside these windows.
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (tuple): lower and upper bounds (K1, K2) of the corridor
+        width (float): half width of the localization windows around the bounds
+
+    Returns:
+        (np.ndarray,np.ndarray): smooth payoff and its derivative at each terminal price,
+                                 in the dtype of x
+    """
+    K1, K2 = K
+    width = np.asarray(width, dtype=x.dtype)
+    value = np.clip((x - K1 + width) / (2 * width), 0.0, 1.0) - np.clip(
+        (x - K2 + width) / (2 * width), 0.0, 1.0
+    )
+    derivative = (np.abs(x - K1) < width) / (2 * width) - (np.abs(x - K2) < width) / (
+        2 * width
+    )
+    return value, derivative
+
+
+def corridor_payoff_scalar(x, K):
+    """Payoff of a corridor option on a single terminal price, compiled by the numba backend
+
+    Args:
+        x (float): terminal price of the underlying
+        K (np.ndarray): lower and upper bounds [K1, K2] of the corridor
+
+    Returns:
+        float: 1 if the terminal price lies in [K1, K2], 0 otherwise
+    """
+    return 1.0 if K[0] <= x <= K[1] else 0.0
+
+
 #######################
 # European Call Class #
 #######################
@@ -46,15 +105,39 @@ def __init__(self, S0, K1,K2, r, sigma, T):
         """
 
         EuropeanDerivative.__init__(
-            self, S0, (K1,K2), r, sigma, T, lambda x: 1 if (x >= K1 and x<=K2) else 0, "Corridor"
+            self, S0, (K1,K2), r, sigma, T, corridor_payoff, "Corridor",
+            corridor_payoff_smooth, corridor_payoff_scalar
         )
 
+    ###############################################
+    # Exact greeks values with Black&Scoles Model #
+    ###############################################
+
+    def greeks_exact(self):
+        """Computes delta,vega and gamma of the option
+
+        Returns:
+            (float,float,float): delta, vega, and gamma of the option
+        """
+
+        greeks = corridor_greeks(
+            self.params["price_0"],
+            *self.params["strike"],
+            self.params["interest_rate"],
+            self.params["vol"],
+            self.params["maturity"],
+        )
+
+        return greeks["delta"], greeks["vega"], greeks["gamma"]
+
 
 ########
 #-Main-#
 ########
 if __name__ == "__main__":
 
+    import matplotlib.pyplot as plt
+
     ############
     # fix seed #
     ############
@@ -85,38 +168,26 @@ def __init__(self, S0, K1,K2, r, sigma, T):
     # Greeks : exact vs finite difference method vs malliavin #
     ###########################################################
 
+    delta, vega, gamma = Corridor_option.greeks_exact()
+
     start_time = datetime.datetime.now()
 
-    VEGA_epsilon = np.array([
-        Corridor_option.greeks_difference_method(
-            N=i, epsilon=eps_vega, param__="vol", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    DELTA_epsilon = np.array([
-        Corridor_option.greeks_difference_method(
-            N=i, epsilon=epse_delta, param__="price_0", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_epsilon = np.array([
-        Corridor_option.greeks_difference_method(
-            N=i, epsilon=eps_gamma, param__="price_0", order=2
-        )
-        for i in range(1,N_max,step)
-    ])
-
-    VEGA_malliavin = np.array([
-        Corridor_option.greeks_malliavin(N=i, param__="vol", order=1) for i in range(1,N_max,step)
-    ])
-    DELTA_malliavin = np.array([
-        Corridor_option.greeks_malliavin(N=i, param__="price_0", order=1)
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_malliavin = np.array([
-        Corridor_option.greeks_malliavin(N=i, param__="price_0", order=2)
-        for i in range(1,N_max,step)
-    ])
+    checkpoints = np.arange(1, N_max, step)
+
+    VEGA_epsilon = Corridor_option.convergence_difference(
+        checkpoints, epsilon=eps_vega, param__="vol", order=1
+    )
+    DELTA_epsilon = Corridor_option.convergence_difference(
+        checkpoints, epsilon=epse_delta, param__="price_0", order=1
+    )
+    GAMMA_epsilon = Corridor_option.convergence_difference(
+        checkpoints, epsilon=eps_gamma, param__="price_0", order=2
+    )
+
+    malliavin = Corridor_option.convergence_malliavin(checkpoints)
+    VEGA_malliavin = malliavin["vega"]
+    DELTA_malliavin = malliavin["delta"]
+    GAMMA_malliavin = malliavin["gamma"]
 
     end_time = datetime.datetime.now()
 
@@ -155,6 +226,7 @@ def __init__(self, S0, K1,K2, r, sigma, T):
 
     ax[0].plot(NB_mc,DELTA_epsilon, label="finite difference method", color="blue")
     ax[0].plot(NB_mc,DELTA_malliavin, label="maliavin method", color="red")
+    ax[0].axhline(y=delta, color="g", linestyle="--", label=f"exact value {delta:.4f}")
     ax[0].set_xlabel(r"Number of iterations")
     ax[0].set_ylabel(r"$\Delta$", fontsize=15)
     ax[0].grid()
@@ -162,6 +234,7 @@ def __init__(self, S0, K1,K2, r, sigma, T):
 
     ax[1].plot(NB_mc,GAMMA_epsilon, label="finite difference method", color="blue")
     ax[1].plot(NB_mc,GAMMA_malliavin, label="maliavin method", color="red")
+    ax[1].axhline(y=gamma, color="g", linestyle="--", label=f"exact value {gamma:.5f}")
     ax[1].set_xlabel(r"Number of iterations")
     ax[1].set_ylabel(r"$\Gamma$", fontsize=15)
     ax[1].grid()
@@ -169,6 +242,7 @@ def __init__(self, S0, K1,K2, r, sigma, T):
 
     ax[2].plot(NB_mc,VEGA_epsilon, label="finite difference method", color="blue")
     ax[2].plot(NB_mc,VEGA_malliavin, label="maliavin method", color="red")
+    ax[2].axhline(y=vega, color="g", linestyle="--", label=f"exact value {vega:.2f}")
     ax[2].set_xlabel(r"Number of iterations")
     ax[2].set_ylabel(r"$\nu$", fontsize=15)
     ax[2].grid()
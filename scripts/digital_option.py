@@ -15,11 +15,63 @@
 ############
 
 from european_derivative import EuropeanDerivative
+from analytic import digital_greeks
 import numpy as np
-import matplotlib.pyplot as plt
 import datetime
 
 
+##########
+# payoff #
+##########
+
+
+def digital_payoff(x, K):
+    """Vectorized payoff of a digital (binary) option
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (float): strike
+
+    Returns:
+        np.ndarray: 1 where the terminal price is above the strike, 0 elsewhere
+    """
+    return (x >= K).astype(x.dtype)
+
+
+def digital_payoff_smooth(x, K, width):
+    """Smooth approximation of the digital payoff used by localized Malliavin estimators
+
+    The jump at K is replaced by a linear ramp on [K - width, K + width], so the
+    approximation coincides with the payoff outside this window.
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (float): strike
+        width (float): half width of the localization window around the strike
+
+    Returns:
+        (np.ndarray,np.ndarray): smooth payoff and its derivative at each terminal price,
+                                 in the dtype of x
+    """
+    width = np.asarray(width, dtype=x.dtype)
+    value = np.clip((x - K + width) / (2 * width), 0.0, 1.0)
+    derivative = (np.abs(x - K) < width) / (2 * width)
+    return value, derivative
+
+
+def digital_payoff_scalar(x, K):
+    """Payoff of a digital option on a single terminal price, compiled by the numba backend
+
+    Args:
+        x (float): terminal price of the underlying
+        K (np.ndarray): strike as a one element array
+
+    Returns:
+        float: 1 if the terminal price is above the strike, 0 otherwise
+    """
+    return 1.0 if x >= K[0] else 0.0
+
+
 #######################
 # European Call Class #
 #######################
@@ -44,15 +96,39 @@ def __init__(self, S0, K, r, sigma, T):
             T (float): maturity in years
         """
         EuropeanDerivative.__init__(
-            self, S0, K, r, sigma, T, lambda x: 1 if x >= K else 0, "digital"
+            self, S0, K, r, sigma, T, digital_payoff, "digital",
+            digital_payoff_smooth, digital_payoff_scalar
         )
 
+    ###############################################
+    # Exact greeks values with Black&Scoles Model #
+    ###############################################
+
+    def greeks_exact(self):
+        """Computes delta,vega and gamma of the option
+
+        Returns:
+            (float,float,float): delta, vega, and gamma of the option
+        """
+
+        greeks = digital_greeks(
+            self.params["price_0"],
+            self.params["strike"],
+            self.params["interest_rate"],
+            self.params["vol"],
+            self.params["maturity"],
+        )
+
+        return greeks["delta"], greeks["vega"], greeks["gamma"]
+
 
 ########
 #-Main-#
 ########
 if __name__ == "__main__":
 
+    import matplotlib.pyplot as plt
+
     ############
     # fix seed #
     ############
@@ -83,38 +159,26 @@ def __init__(self, S0, K, r, sigma, T):
     # Greeks : exact vs finite difference method vs malliavin #
     ###########################################################
 
+    delta, vega, gamma = digital_option.greeks_exact()
+
     start_time = datetime.datetime.now()
 
-    VEGA_epsilon = np.array([
-        digital_option.greeks_difference_method(
-            N=i, epsilon=eps_vega, param__="vol", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    DELTA_epsilon = np.array([
-        digital_option.greeks_difference_method(
-            N=i, epsilon=epse_delta, param__="price_0", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_epsilon = np.array([
-        digital_option.greeks_difference_method(
-            N=i, epsilon=eps_gamma, param__="price_0", order=2
-        )
-        for i in range(1,N_max,step)
-    ])
-
-    VEGA_malliavin = np.array([
-        digital_option.greeks_malliavin(N=i, param__="vol", order=1) for i in range(1,N_max,step)
-    ])
-    DELTA_malliavin = np.array([
-        digital_option.greeks_malliavin(N=i, param__="price_0", order=1)
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_malliavin = np.array([
-        digital_option.greeks_malliavin(N=i, param__="price_0", order=2)
-        for i in range(1,N_max,step)
-    ])
+    checkpoints = np.arange(1, N_max, step)
+
+    VEGA_epsilon = digital_option.convergence_difference(
+        checkpoints, epsilon=eps_vega, param__="vol", order=1
+    )
+    DELTA_epsilon = digital_option.convergence_difference(
+        checkpoints, epsilon=epse_delta, param__="price_0", order=1
+    )
+    GAMMA_epsilon = digital_option.convergence_difference(
+        checkpoints, epsilon=eps_gamma, param__="price_0", order=2
+    )
+
+    malliavin = digital_option.convergence_malliavin(checkpoints)
+    VEGA_malliavin = malliavin["vega"]
+    DELTA_malliavin = malliavin["delta"]
+    GAMMA_malliavin = malliavin["gamma"]
 
     end_time = datetime.datetime.now()
 
@@ -153,6 +217,7 @@ def __init__(self, S0, K, r, sigma, T):
 
     ax[0].plot(NB_mc,DELTA_epsilon, label="finite difference method", color="blue")
     ax[0].plot(NB_mc,DELTA_malliavin, label="maliavin method", color="red")
+    ax[0].axhline(y=delta, color="g", linestyle="--", label=f"exact value {delta:.4f}")
     ax[0].set_xlabel(r"Number of iterations")
     ax[0].set_ylabel(r"$\Delta$", fontsize=15)
     ax[0].grid()
@@ -160,6 +225,7 @@ def __init__(self, S0, K, r, sigma, T):
 
     ax[1].plot(NB_mc,GAMMA_epsilon, label="finite difference method", color="blue")
     ax[1].plot(NB_mc,GAMMA_malliavin, label="maliavin method", color="red")
+    ax[1].axhline(y=gamma, color="g", linestyle="--", label=f"exact value {gamma:.5f}")
     ax[1].set_xlabel(r"Number of iterations")
     ax[1].set_ylabel(r"$\Gamma$", fontsize=15)
     ax[1].grid()
@@ -167,6 +233,7 @@ def __init__(self, S0, K, r, sigma, T):
 
     ax[2].plot(NB_mc,VEGA_epsilon, label="finite difference method", color="blue")
     ax[2].plot(NB_mc,VEGA_malliavin, label="maliavin method", color="red")
+    ax[2].axhline(y=vega, color="g", linestyle="--", label=f"exact value {vega:.2f}")
     ax[2].set_xlabel(r"Number of iterations")
     ax[2].set_ylabel(r"$\nu$", fontsize=15)
     ax[2].grid()
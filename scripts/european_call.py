@@ -15,12 +15,65 @@
 ############
 
 from european_derivative import EuropeanDerivative
+from analytic import call_greeks
 import numpy as np
-import scipy.stats as si
-import matplotlib.pyplot as plt
 import datetime
 
 
+##########
+# payoff #
+##########
+
+
+def call_payoff(x, K):
+    """Vectorized payoff of a european call
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (float): strike
+
+    Returns:
+        np.ndarray: payoff for each terminal price
+    """
+    return np.maximum(x - K, 0.0)
+
+
+def call_payoff_smooth(x, K, width):
+    """Smooth approximation of the call payoff used by localized Malliavin estimators
+
+    The kink at K is replaced by a parabola on [K - width, K + width], so the
+    approximation coincides with the payoff outside this window.
+
+    Args:
+        x (np.ndarray): terminal prices of the underlying
+        K (float): strike
+        width (float): half width of the localization window around the strike
+
+    Returns:
+        (np.ndarray,np.ndarray): smooth payoff and its derivative at each terminal price,
+                                 in the dtype of x
+    """
+    width = np.asarray(width, dtype=x.dtype)
+    ramp = np.clip((x - K + width) / (2 * width), 0.0, 1.0)
+    value = np.where(
+        x >= K + width, x - K, np.where(x > K - width, (x - K + width) ** 2 / (4 * width), 0.0)
+    )
+    return value, ramp
+
+
+def call_payoff_scalar(x, K):
+    """Payoff of a european call on a single terminal price, compiled by the numba backend
+
+    Args:
+        x (float): terminal price of the underlying
+        K (np.ndarray): strike as a one element array
+
+    Returns:
+        float: payoff
+    """
+    return max(x - K[0], 0.0)
+
+
 #######################
 # European Call Class #
 #######################
@@ -46,79 +99,13 @@ def __init__(self, S0, K, r, sigma, T):
         """
 
         EuropeanDerivative.__init__(
-            self, S0, K, r, sigma, T, lambda x: max(x - K, 0), "call"
+            self, S0, K, r, sigma, T, call_payoff, "call", call_payoff_smooth, call_payoff_scalar
         )
 
     ###############################################
     # Exact greeks values with Black&Scoles Model #
     ###############################################
 
-    def __black_scholes_params(self):
-        """Computes classical black scholes parameters commonly noted d1,d2
-
-        Returns:
-            (float,float): black scholes parameters d1 and d2
-        """
-        r, T, S, sigma, K = (
-            self.params["interest_rate"],
-            self.params["maturity"],
-            self.params["price_0"],
-            self.params["vol"],
-            self.params["strike"],
-        )
-
-        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-        d2 = (np.log(S / K) + (r - 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-
-        return d1, d2
-
-    def __exact_delta(self):
-        """Computes exact value of Delta
-
-        Returns:
-            float: delta of the option
-        """
-
-        d1, d2 = self.__black_scholes_params()
-
-        delta = si.norm.cdf(d1, 0.0, 1.0)
-
-        return delta
-
-    def __exact_vega(self):
-        """Computes exact value of vega
-
-        Returns:
-            float: vega of the option
-        """
-
-        d1, d2 = self.__black_scholes_params()
-
-        prob_density = 1 / np.sqrt(2 * np.pi) * np.exp(-(d1 ** 2) * 0.5)
-
-        vega = S0 * prob_density * np.sqrt(self.params["maturity"])
-
-        return vega
-
-    def __exact_gamma(self):
-        """Computes exact value of gamma
-
-        Returns:
-            float: gamma of the option
-        """
-
-        d1, d2 = self.__black_scholes_params()
-
-        prob_density = 1 / np.sqrt(2 * np.pi) * np.exp(-(d1 ** 2) * 0.5)
-
-        gamma = prob_density / (
-            self.params["price_0"]
-            * self.params["vol"]
-            * np.sqrt(self.params["maturity"])
-        )
-
-        return gamma
-
     def greeks_exact(self):
         """Computes delta,vega and gamma of the option
 
@@ -126,11 +113,15 @@ def greeks_exact(self):
             (float,float,float): delta, vega, and gamma of the option
         """
 
-        delta = self.__exact_delta()
-        vega = self.__exact_vega()
-        gamma = self.__exact_gamma()
+        greeks = call_greeks(
+            self.params["price_0"],
+            self.params["strike"],
+            self.params["interest_rate"],
+            self.params["vol"],
+            self.params["maturity"],
+        )
 
-        return delta, vega, gamma
+        return greeks["delta"], greeks["vega"], greeks["gamma"]
 
 
 ########
@@ -139,6 +130,8 @@ def greeks_exact(self):
 
 if __name__ == "__main__":
 
+    import matplotlib.pyplot as plt
+
     ############
     # fix seed #
     ############
@@ -173,36 +166,22 @@ def greeks_exact(self):
 
     start_time = datetime.datetime.now()
 
-    VEGA_epsilon = np.array([
-        call_option.greeks_difference_method(
-            N=i, epsilon=eps_vega, param__="vol", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    DELTA_epsilon = np.array([
-        call_option.greeks_difference_method(
-            N=i, epsilon=epse_delta, param__="price_0", order=1
-        )
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_epsilon = np.array([
-        call_option.greeks_difference_method(
-            N=i, epsilon=eps_gamma, param__="price_0", order=2
-        )
-        for i in range(1,N_max,step)
-    ])
-
-    VEGA_malliavin = np.array([
-        call_option.greeks_malliavin(N=i, param__="vol", order=1) for i in range(1,N_max,step)
-    ])
-    DELTA_malliavin = np.array([
-        call_option.greeks_malliavin(N=i, param__="price_0", order=1)
-        for i in range(1,N_max,step)
-    ])
-    GAMMA_malliavin = np.array([
-        call_option.greeks_malliavin(N=i, param__="price_0", order=2)
-        for i in range(1,N_max,step)
-    ])
+    checkpoints = np.arange(1, N_max, step)
+
+    VEGA_epsilon = call_option.convergence_difference(
+        checkpoints, epsilon=eps_vega, param__="vol", order=1
+    )
+    DELTA_epsilon = call_option.convergence_difference(
+        checkpoints, epsilon=epse_delta, param__="price_0", order=1
+    )
+    GAMMA_epsilon = call_option.convergence_difference(
+        checkpoints, epsilon=eps_gamma, param__="price_0", order=2
+    )
+
+    malliavin = call_option.convergence_malliavin(checkpoints)
+    VEGA_malliavin = malliavin["vega"]
+    DELTA_malliavin = malliavin["delta"]
+    GAMMA_malliavin = malliavin["gamma"]
 
     end_time = datetime.datetime.now()
 
@@ -15,7 +15,207 @@
 ############
 
 from abstract_derivative import Derivative
+from instrumentation import instrumented, stage
+from kernels import FUSED_MIN_PATHS, NUMBA_AVAILABLE, fused_malliavin, fused_malliavin_generator
+from running_stats import RunningStats
+from scipy.special import ndtri
+from scipy.stats import qmc
 import numpy as np
+import warnings
+import time
+
+
+################
+# Normal draws #
+################
+
+
+def draw_normals(size, rng=None, sampling="pseudo", dtype=np.float64):
+    """Draws standard normals from a generator or from numpy's global state
+
+    Args:
+        size (int or tuple): shape of the draws, paths along the last axis
+        rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                             state if None. Any object with a
+                                             standard_normal(size) method works, e.g. a
+                                             ScenarioStream, except with sobol sampling
+                                             where it seeds the scrambling. Defaults to None.
+        sampling (str, optional): "pseudo" for pseudo-random draws or "sobol" for a
+                                  scrambled Sobol sequence mapped through the inverse
+                                  normal cdf, one dimension per row. The sequence is only
+                                  balanced for a power of 2 number of paths, otherwise a
+                                  warning is issued once. Defaults to "pseudo".
+        dtype (np.dtype, optional): precision of the draws and of every array derived from
+                                    them (S_T, payoffs, weights). np.float32 halves memory
+                                    traffic, estimators still accumulate their sums in
+                                    float64. Defaults to np.float64.
+
+    Raises:
+        Exception: sampling should be in ["pseudo", "sobol"]
+        Exception: rng should be a Generator or an int seed with sobol sampling
+
+    Returns:
+        np.ndarray: standard normal draws
+    """
+    with stage("rng") as recorder:
+        if sampling == "sobol":
+            shape = (size,) if np.ndim(size) == 0 else tuple(size)
+            if rng is None:
+                rng = np.random.randint(2 ** 31)
+            elif not isinstance(rng, (np.random.Generator, int, np.integer)):
+                raise Exception(f"Invalid rng {rng!r} for sobol sampling, expected a Generator")
+            engine = qmc.Sobol(d=int(np.prod(shape[:-1])), scramble=True, seed=rng)
+            with warnings.catch_warnings():
+                # scipy warns on every call, _warn_sobol_balance warns once per process
+                warnings.simplefilter("ignore", UserWarning)
+                points = engine.random(shape[-1])
+            if shape[-1] & (shape[-1] - 1):
+                _warn_sobol_balance(shape[-1])
+            return recorder.track(ndtri(points).T.reshape(shape).astype(dtype, copy=False))
+
+        if sampling != "pseudo":
+            raise Exception(f"Invalid sampling {sampling} not in ['pseudo','sobol']")
+
+        if rng is None:
+            return recorder.track(np.random.normal(size=size).astype(dtype, copy=False))
+        return recorder.track(rng.standard_normal(size, dtype=dtype))
+
+
+_SOBOL_BALANCE_WARNED = False
+
+
+def _warn_sobol_balance(n):
+    """Warns, once per process, that a Sobol sample is not a power of 2 long
+
+    Args:
+        n (int): number of points drawn
+    """
+    global _SOBOL_BALANCE_WARNED
+    if not _SOBOL_BALANCE_WARNED:
+        _SOBOL_BALANCE_WARNED = True
+        warnings.warn(
+            f"Sobol sampling with {n} paths, the balance properties of the sequence "
+            "require a power of 2 number of paths",
+            stacklevel=3,
+        )
+
+
+#####################
+# Malliavin weights #
+#####################
+
+
+def malliavin_weights(G, S0, sigma, T):
+    """Malliavin weights of the Black&Scholes model for delta, vega and gamma
+
+    All arguments broadcast against each other, so G can be a batch of draws and
+    S0, sigma, T arrays of contract parameters.
+
+    Args:
+        G (np.ndarray): standard normal draws used to simulate S_T
+        S0 (float or np.ndarray): price of the underlying at t=0
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity
+
+    Returns:
+        dict: weights for "delta", "vega" and "gamma", to be multiplied by the payoff
+    """
+    with stage("weights") as recorder:
+        vega = recorder.track((G ** 2 / sigma) - G * (T ** 0.5) - (1 / sigma))
+        return {
+            "delta": recorder.track(G / (S0 * sigma * T ** 0.5), count_paths=False),
+            "vega": vega,
+            "gamma": recorder.track(vega / (S0 * S0 * sigma * T), count_paths=False),
+        }
+
+
+def higher_order_malliavin_weights(G, S0, sigma, T):
+    """Iterated Malliavin weights of the Black&Scholes model for vanna, volga, speed and rho
+
+    Each weight is the ratio of a derivative of the density of log S_T to the
+    density, evaluated at the simulated draw, so it multiplies the same payoff
+    sample as malliavin_weights. The rho weight returns the whole sensitivity of
+    the discounted payoff, the -T term coming from the discount factor included.
+
+    Args:
+        G (np.ndarray): standard normal draws used to simulate S_T
+        S0 (float or np.ndarray): price of the underlying at t=0
+        sigma (float or np.ndarray): volatility
+        T (float or np.ndarray): maturity
+
+    Returns:
+        dict: weights for "vanna", "volga", "speed" and "rho", to be multiplied by the
+              discounted payoff
+    """
+    with stage("weights") as recorder:
+        sqrt_T = T ** 0.5
+        s = sigma * sqrt_T
+        delta = G / (S0 * s)
+        vega = (G ** 2 / sigma) - G * sqrt_T - (1 / sigma)
+        return {
+            "vanna": recorder.track(delta * vega + (sqrt_T - 2 * G / sigma) / (S0 * s)),
+            "volga": recorder.track(
+                vega ** 2
+                + (sqrt_T - G / sigma) * (2 * G / sigma - sqrt_T)
+                + (1 - G ** 2) / sigma ** 2,
+                count_paths=False,
+            ),
+            "speed": recorder.track(
+                (G ** 3 - 3 * G - 3 * s * G ** 2 + 3 * s + 2 * s ** 2 * G) / (s * S0) ** 3,
+                count_paths=False,
+            ),
+            "rho": recorder.track(G * sqrt_T / sigma - T, count_paths=False),
+        }
+
+
+def discount_factor(r, T, dtype=np.float64):
+    """Discount factor exp(-r T) in the precision of the simulated paths
+
+    A float64 scalar would promote float32 payoffs to float64, so the factor is
+    cast to the dtype of the paths it multiplies.
+
+    Args:
+        r (float or np.ndarray): interest rate
+        T (float or np.ndarray): maturity
+        dtype (np.dtype, optional): precision of the simulated paths. Defaults to np.float64.
+
+    Returns:
+        np.ndarray: discount factor, 0-d for scalar r and T
+    """
+    return np.asarray(np.exp(-r * T), dtype=dtype)
+
+
+def bump_param(value, epsilon):
+    """Shifts a model parameter by epsilon
+
+    A tuple strike (K1, K2) is shifted as a whole, every bound by the same epsilon,
+    so the finite difference gives the sensitivity to a parallel move of the strikes.
+
+    Args:
+        value (float or tuple): value of the parameter
+        epsilon (float): bump size
+
+    Returns:
+        float or tuple: bumped value, a tuple for a tuple strike
+    """
+    if isinstance(value, tuple):
+        return tuple(item + epsilon for item in value)
+    return value + epsilon
+
+
+def scenario_column(values):
+    """Stacks the values of a parameter across scenarios so that they broadcast against paths
+
+    Args:
+        values (list of float or list of tuple): value of the parameter in each scenario
+
+    Returns:
+        np.ndarray or tuple: column of shape (n, 1), or a tuple of such columns for tuple strikes
+    """
+    if isinstance(values[0], tuple):
+        return tuple(np.array(items, dtype=np.float64)[:, None] for items in zip(*values))
+    return np.array(values, dtype=np.float64)[:, None]
+
 
 #############################
 # European Class Derivative #
@@ -29,7 +229,9 @@ class EuropeanDerivative(Derivative):
     # Class Builder #
     #################
 
-    def __init__(self, S0, K, r, sigma, T, payoff, name):
+    def __init__(
+        self, S0, K, r, sigma, T, payoff, name, smooth_payoff=None, scalar_payoff=None
+    ):
         """Constructor of european derivative
 
         Args:
@@ -38,8 +240,19 @@ def __init__(self, S0, K, r, sigma, T, payoff, name):
             r (float): interest rate
             sigma (float): volatility
             T (float): maturity
-            payoff (function): payoff of the option
+            payoff (function): vectorized payoff of the option, called as payoff(S_T, K)
+                               with S_T a numpy array of terminal prices and K the strike
             name (str): name of the option
+            smooth_payoff (function, optional): smooth approximation of the payoff, called as
+                                                smooth_payoff(S_T, K, width) and returning its
+                                                value and derivative, equal to the payoff
+                                                outside windows of half width `width` around
+                                                the kinks. Needed by localized Malliavin
+                                                estimators. Defaults to None.
+            scalar_payoff (function, optional): payoff of a single terminal price, called as
+                                                scalar_payoff(x, K) with K a float64 array of
+                                                strikes and compiled by the numba backend.
+                                                Defaults to None.
         """
         self.name = "_".join(["euro", name])
         self.params = {
@@ -50,12 +263,24 @@ def __init__(self, S0, K, r, sigma, T, payoff, name):
             "maturity": T,
         }
         self.payoff = payoff
+        self.smooth_payoff = smooth_payoff
+        self.scalar_payoff = scalar_payoff
 
     ######################
     # Monte-Carlo pricer #
     ######################
 
-    def price_monte_carlo(self, N, epsilon=0, param__=None):
+    @instrumented
+    def price_monte_carlo(
+        self,
+        N,
+        epsilon=0,
+        param__=None,
+        rng=None,
+        sampling="pseudo",
+        variance_reduction=None,
+        dtype=np.float64,
+    ):
         """Prices derivative under Black&Scholes assumptions
 
         Args:
@@ -64,32 +289,83 @@ def price_monte_carlo(self, N, epsilon=0, param__=None):
                                        to compute greeks with finite difference method easily. Defaults to 0.
             param__ (str, optional): parameter of black & scholes model to offset with 
                                     espsilon if diffrent this None. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            variance_reduction (str or list of str, optional): "antithetic" and/or
+                                      "control_variate" (see _reduced_estimates). Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Returns:
             float : price of the derivative
         """
-        G = np.random.normal(size=N)
-        sum = 0
         params__ = self.params.copy()
         if param__:
-            params__[param__] = self.params[param__] + epsilon
-        for i in range(N):
-            sum += self.payoff(
+            params__[param__] = bump_param(self.params[param__], epsilon)
+        if variance_reduction is not None:
+            return self._reduced_estimates(
+                N, params__, variance_reduction, rng, sampling, dtype
+            )["price"]
+
+        G = draw_normals(N, rng, sampling, dtype)
+        S_T = self._terminal_price(G, params__)
+
+        return (
+            self._evaluate_payoff(S_T, params__["strike"]).sum(dtype=np.float64)
+            * np.exp(-params__["interest_rate"] * params__["maturity"])
+            / N
+        )
+
+    def _terminal_price(self, G, params__):
+        """Simulates the underlying at maturity under Black&Scholes assumptions
+
+        Args:
+            G (np.ndarray): standard normal draws, one per path
+            params__ (dict): model parameters, same keys as self.params
+
+        Returns:
+            np.ndarray: terminal prices S_T, one per path
+        """
+        with stage("exp") as recorder:
+            return recorder.track(
                 params__["price_0"]
                 * np.exp(
-                    (params__["interest_rate"] - params__["vol"] ** 2 / 2)
-                    * params__["maturity"]
-                    + params__["vol"] * (params__["maturity"] ** 0.5) * G[i]
+                    (params__["interest_rate"] - params__["vol"] ** 2 / 2) * params__["maturity"]
+                    + params__["vol"] * (params__["maturity"] ** 0.5) * G
                 )
             )
 
-        return sum * np.exp(-params__["interest_rate"] * params__["maturity"]) / N
+    def _evaluate_payoff(self, S_T, K):
+        """Evaluates the vectorized payoff on a batch of terminal prices
+
+        Args:
+            S_T (np.ndarray): terminal prices of the underlying
+            K (float or tuple or np.ndarray): strike(s)
+
+        Returns:
+            np.ndarray: payoff for each terminal price
+        """
+        with stage("payoff") as recorder:
+            return recorder.track(self.payoff(S_T, K))
 
     ########################################
     # Greeks with finite difference method #
     ########################################
 
-    def greeks_difference_method(self, N, epsilon, param__, order=1):
+    @instrumented
+    def greeks_difference_method(
+        self,
+        N,
+        epsilon,
+        param__,
+        order=1,
+        crn=False,
+        rng=None,
+        sampling="pseudo",
+        dtype=np.float64,
+    ):
         """Computes greeks with finite difference method
 
         Args:
@@ -97,22 +373,145 @@ def greeks_difference_method(self, N, epsilon, param__, order=1):
             epsilon (float): epsilon used in finite diferent method for derivative estimation
             param__ (str): name of parameter to which we compute greek
             order (int, optional): order of derivative. Defaults to 1.
+            crn (bool, optional): if True, bumped and unbumped prices share the same normal
+                                  draws (common random numbers). Defaults to False.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Returns:
             float: value of the greek
         """
+        if crn:
+            return self.greeks_difference_crn(N, epsilon, param__, order, rng, sampling, dtype)[
+                (param__, epsilon, order)
+            ]
         if order == 2:
             return (
-                self.price_monte_carlo(N, epsilon, param__)
-                + self.price_monte_carlo(N, -epsilon, param__)
-                - 2 * self.price_monte_carlo(N)
+                self.price_monte_carlo(N, epsilon, param__, rng, sampling, dtype=dtype)
+                + self.price_monte_carlo(N, -epsilon, param__, rng, sampling, dtype=dtype)
+                - 2 * self.price_monte_carlo(N, rng=rng, sampling=sampling, dtype=dtype)
             ) / (epsilon ** 2)
         if order == 1:
             return (
-                self.price_monte_carlo(N, epsilon, param__)
-                - self.price_monte_carlo(N, -epsilon, param__)
+                self.price_monte_carlo(N, epsilon, param__, rng, sampling, dtype=dtype)
+                - self.price_monte_carlo(N, -epsilon, param__, rng, sampling, dtype=dtype)
             ) / (epsilon * 2)
 
+    @instrumented
+    def greeks_difference_crn(
+        self, N, epsilon, param__, order=1, rng=None, sampling="pseudo", dtype=np.float64
+    ):
+        """Computes finite difference greeks with common random numbers
+
+        A single set of normals is drawn and every bumped scenario (+/- each epsilon on
+        each parameter) is priced from it in one vectorized pass, so the bumped prices
+        are strongly correlated and the variance no longer blows up like 1/epsilon**2.
+
+        Args:
+            N (int): number of iterations
+            epsilon (float or list of floats): bump size(s)
+            param__ (str or list of str): name(s) of parameters in self.params to bump
+            order (int or list of ints, optional): order(s) of derivative in [1,2]. Defaults to 1.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: value of the greek for each (param__, epsilon, order) key
+        """
+        G = draw_normals(N, rng, sampling, dtype)
+
+        return {
+            key: samples.mean(dtype=np.float64)
+            for key, samples in self._difference_samples(G, epsilon, param__, order).items()
+        }
+
+    def _difference_samples(self, G, epsilon, param__, order=1):
+        """Per-path finite difference samples computed with common random numbers
+
+        Args:
+            G (np.ndarray): standard normal draws, one per path. A 2d array with one row
+                            per scenario (unbumped first, then +/- epsilon for each
+                            parameter and epsilon) gives independent draws instead.
+            epsilon (float or list of floats): bump size(s)
+            param__ (str or list of str): name(s) of parameters in self.params to bump, every
+                                          bound of a tuple strike is bumped by epsilon
+            order (int or list of ints, optional): order(s) of derivative in [1,2]. Defaults to 1.
+
+        Raises:
+            Exception: order should be in [1,2]
+
+        Returns:
+            dict: arrays of per-path samples for each (param__, epsilon, order) key
+        """
+        epsilons = np.atleast_1d(epsilon).tolist()
+        param_names = [param__] if isinstance(param__, str) else list(param__)
+        orders = np.atleast_1d(order).tolist()
+
+        for order__ in orders:
+            if order__ not in [1, 2]:
+                raise Exception(f"Invalid order {order__} not in [1,2]")
+
+        scenarios = [self.params]
+        for name in param_names:
+            for eps in epsilons:
+                for sign in [1, -1]:
+                    params__ = self.params.copy()
+                    params__[name] = bump_param(self.params[name], sign * eps)
+                    scenarios.append(params__)
+
+        prices = self.__scenario_samples(G, scenarios)
+
+        samples = {}
+        i = 1
+        for name in param_names:
+            for eps in epsilons:
+                up, down = prices[i], prices[i + 1]
+                i += 2
+                for order__ in orders:
+                    if order__ == 1:
+                        samples[(name, eps, 1)] = (up - down) / (eps * 2)
+                    else:
+                        samples[(name, eps, 2)] = (up + down - 2 * prices[0]) / (eps ** 2)
+
+        return samples
+
+    def __scenario_samples(self, G, scenarios):
+        """Per-path discounted payoffs of several parameter scenarios on the same draws
+
+        Bumped parameters are stacked in float64, so scenario prices are computed in
+        float64 even on float32 draws and small bumps are not lost to rounding. A bumped
+        tuple strike is stacked as a tuple of columns, one per bound.
+
+        Args:
+            G (np.ndarray): standard normal draws, either shared by all scenarios
+                            or one row per scenario
+            scenarios (list of dict): parameter sets, same keys as self.params
+
+        Returns:
+            np.ndarray: discounted payoffs of shape (len(scenarios), len(G))
+        """
+        stacked = {}
+        for key in self.params:
+            values = [params__[key] for params__ in scenarios]
+            if all(value == values[0] for value in values):
+                stacked[key] = values[0]
+            else:
+                stacked[key] = scenario_column(values)
+
+        S_T = self._terminal_price(G, stacked)
+        discount = np.exp(-stacked["interest_rate"] * stacked["maturity"])
+        payoff = self._evaluate_payoff(S_T, stacked["strike"])
+
+        return np.broadcast_to(discount * payoff, (len(scenarios), G.shape[-1]))
+
     ##########################
     # Exact values of greeks #
     ##########################
@@ -129,18 +528,23 @@ def greeks_exact(self):
     # Malliavin Calculus greeks #
     #############################
 
-    def __delta__malliavin(self, N):
+    def __delta__malliavin(self, N, rng=None, sampling="pseudo", dtype=np.float64):
         """Computes delta of the option using Malliavin Calculus
 
         Args:
             N (int): number of iterations
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Returns:
             float: delta of the option
         """
 
-        G = np.random.normal(size=N)
-        sum = 0
+        G = draw_normals(N, rng, sampling, dtype)
         params__ = self.params.copy()
         r, T, S0, sigma = (
             params__["interest_rate"],
@@ -149,29 +553,32 @@ def __delta__malliavin(self, N):
             params__["vol"],
         )
 
-        sum = 0
+        S_T = self._terminal_price(G, params__)
+        weight = malliavin_weights(G, S0, sigma, T)["delta"]
+        sum = (self._evaluate_payoff(S_T, params__["strike"]) * weight).sum(dtype=np.float64)
 
-        for x in G:
-            S_T = S0 * np.exp((r - (sigma ** 2) / 2) * T + sigma * (T ** 0.5) * x)
-            sum += self.payoff(S_T) * (x / (sigma * T ** 0.5))
-
-        delta = np.exp(-r * T) * sum / S0
+        delta = np.exp(-r * T) * sum
         delta = delta / N
 
         return delta
 
-    def __vega__malliavin(self, N):
+    def __vega__malliavin(self, N, rng=None, sampling="pseudo", dtype=np.float64):
         """Computes vega of the option using Malliavin Calculus
 
         Args:
             N (int): number of iterations
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Returns:
             float: vega of the option
         """
 
-        G = np.random.normal(size=N)
-        sum = 0
+        G = draw_normals(N, rng, sampling, dtype)
         params__ = self.params.copy()
         r, T, S0, sigma = (
             params__["interest_rate"],
@@ -180,22 +587,26 @@ def __vega__malliavin(self, N):
             params__["vol"],
         )
 
-        sum = 0
-
-        for x in G:
-            S_T = S0 * np.exp((r - (sigma ** 2) / 2) * T + sigma * (T ** 0.5) * x)
-            sum += self.payoff(S_T) * ((x ** 2 / sigma) - x * (T ** 0.5) - (1 / sigma))
+        S_T = self._terminal_price(G, params__)
+        weight = malliavin_weights(G, S0, sigma, T)["vega"]
+        sum = (self._evaluate_payoff(S_T, params__["strike"]) * weight).sum(dtype=np.float64)
 
         vega = np.exp(-r * T) * sum
         vega = vega / N
 
         return vega
 
-    def __gamma__malliavin(self, N):
+    def __gamma__malliavin(self, N, rng=None, sampling="pseudo", dtype=np.float64):
         """Computes gamma of the option using Malliavin Calculus
 
         Args:
             N (int): number of iterations
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Returns:
             float: gamma of the option
@@ -207,45 +618,849 @@ def __gamma__malliavin(self, N):
             self.params["vol"],
         )
 
-        return self.__vega__malliavin(N) / (S0 * S0 * sigma * T)
+        return self.__vega__malliavin(N, rng, sampling, dtype) / (S0 * S0 * sigma * T)
 
-    def greeks_malliavin(self, N, param__, order):
+    @instrumented
+    def greeks_malliavin(
+        self,
+        N,
+        param__,
+        order,
+        rng=None,
+        sampling="pseudo",
+        variance_reduction=None,
+        backend="numpy",
+        dtype=np.float64,
+    ):
         """Computes greeks using Malliavin Calculus
 
         Args:
             N (int): number of iterations for MC
-            param__ (str): name of parameter to which we compute our derivative (greek)
+            param__ (str): name of parameter to which we compute our derivative (greek),
+                           the cross greek vanna is given by greeks_malliavin_all
             order (int): order of derivative
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            variance_reduction (str or list of str, optional): "antithetic" and/or
+                                      "control_variate" (see _reduced_estimates). Defaults to None.
+            backend (str, optional): "numpy" or "numba" for the fused compiled kernel, numpy
+                                     is used if numba is not installed, the product has no
+                                     scalar_payoff, N is below FUSED_MIN_PATHS or
+                                     variance_reduction is set. Defaults to "numpy".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
 
         Raises:
-            Exception: parame__ should be in ["vol", "price_0"]
-            Exception: order should be in [1,2]
-            Exception: if order2, pram__ should be "price_0"
+            Exception: parame__ should be in ["vol", "price_0", "interest_rate"]
+            Exception: order should be in [1,2,3]
+            Exception: incompatible order and param__ (order 3 only for "price_0",
+                       order 1 only for "interest_rate")
+            Exception: volga, speed and rho are not available with variance_reduction
 
         Returns:
             float: corresponding greeks
         """
 
-        if param__ not in ["vol", "price_0"]:
-            raise Exception(f"Invalid param__ {param__} not in ['vol','price_0']")
-            return
+        if param__ not in ["vol", "price_0", "interest_rate"]:
+            raise Exception(f"Invalid param__ {param__} not in ['vol','price_0','interest_rate']")
+
+        if order not in [1, 2, 3]:
+            raise Exception(f"Invalid order {order} not in [1,2,3]")
 
-        if order not in [1, 2]:
-            raise Exception(f"Invalid order {order} not in [1,2]")
-            return
+        higher_order = {("vol", 2): "volga", ("price_0", 3): "speed", ("interest_rate", 1): "rho"}
+        if (param__, order) in higher_order:
+            return self.greeks_malliavin_all(
+                N, rng, sampling, variance_reduction, dtype=dtype, higher_order=True
+            )[higher_order[(param__, order)]]
+
+        if variance_reduction is not None or backend != "numpy":
+            greek = {("price_0", 1): "delta", ("vol", 1): "vega", ("price_0", 2): "gamma"}.get(
+                (param__, order)
+            )
+            if greek is None:
+                raise Exception("Incompatible order and param__")
+            if variance_reduction is not None:
+                return self._reduced_estimates(
+                    N, self.params, variance_reduction, rng, sampling, dtype
+                )[greek]
+            estimates = self._fused_estimates(N, backend, rng, sampling, dtype)
+            if estimates is not None:
+                return estimates[greek]
 
         if order == 1:
             if param__ == "vol":
-                return self.__vega__malliavin(N)
+                return self.__vega__malliavin(N, rng, sampling, dtype)
 
             if param__ == "price_0":
-                return self.__delta__malliavin(N)
+                return self.__delta__malliavin(N, rng, sampling, dtype)
 
         if order == 2 and param__ == "price_0":
-            return self.__gamma__malliavin(N)
+            return self.__gamma__malliavin(N, rng, sampling, dtype)
 
         raise Exception("Incompatible order and param__")
 
+    def _malliavin_samples(self, G, params__=None, higher_order=False):
+        """Per-path discounted samples of the price and of the Malliavin greeks
+
+        S_T and the payoff are evaluated once and every Malliavin weight is
+        applied to the same sample, averaging each entry gives the estimator.
+
+        Args:
+            G (np.ndarray): standard normal draws, one per path
+            params__ (dict, optional): model parameters, self.params if None. Entries may be
+                                       arrays broadcasting against G (e.g. a column of
+                                       strikes). Defaults to None.
+            higher_order (bool, optional): also returns "vanna", "volga", "speed" and "rho"
+                                           (see higher_order_malliavin_weights). Defaults to False.
+
+        Returns:
+            dict: arrays of per-path samples for "price", "delta", "vega" and "gamma"
+        """
+        if params__ is None:
+            params__ = self.params
+        r, T, S0, sigma = (
+            params__["interest_rate"],
+            params__["maturity"],
+            params__["price_0"],
+            params__["vol"],
+        )
+
+        S_T = self._terminal_price(G, params__)
+        discounted_payoff = discount_factor(r, T, G.dtype) * self._evaluate_payoff(
+            S_T, params__["strike"]
+        )
+
+        samples = {"price": discounted_payoff}
+        for greek, weight in malliavin_weights(G, S0, sigma, T).items():
+            samples[greek] = discounted_payoff * weight
+        if higher_order:
+            for greek, weight in higher_order_malliavin_weights(G, S0, sigma, T).items():
+                samples[greek] = discounted_payoff * weight
+
+        return samples
+
+    @instrumented
+    def greeks_malliavin_all(
+        self,
+        N,
+        rng=None,
+        sampling="pseudo",
+        variance_reduction=None,
+        backend="numpy",
+        dtype=np.float64,
+        higher_order=False,
+    ):
+        """Computes price, delta, vega and gamma with Malliavin Calculus in a single pass
+
+        One set of normals is drawn and the payoff is evaluated once, so the greeks
+        are consistent with each other and cost a single simulation. With
+        higher_order, vanna, volga, speed and rho are weighted from the same sample.
+
+        Args:
+            N (int): number of iterations for MC
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            variance_reduction (str or list of str, optional): "antithetic" and/or
+                                      "control_variate" (see _reduced_estimates). Defaults to None.
+            backend (str, optional): "numpy" or "numba" for the fused compiled kernel, numpy
+                                     is used if numba is not installed, the product has
+                                     no scalar_payoff or N is below FUSED_MIN_PATHS.
+                                     Defaults to "numpy".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+            higher_order (bool, optional): also estimates "vanna", "volga", "speed" and "rho",
+                                           always with the numpy backend. Defaults to False.
+
+        Raises:
+            Exception: higher_order is not available with variance_reduction
+
+        Returns:
+            dict: estimates of "price", "delta", "vega" and "gamma"
+        """
+        if variance_reduction is not None:
+            if higher_order:
+                raise Exception("higher_order greeks are not available with variance_reduction")
+            return self._reduced_estimates(
+                N, self.params, variance_reduction, rng, sampling, dtype
+            )
+
+        if backend != "numpy" and not higher_order:
+            estimates = self._fused_estimates(N, backend, rng, sampling, dtype)
+            if estimates is not None:
+                return estimates
+
+        G = draw_normals(N, rng, sampling, dtype)
+
+        return {
+            greek: samples.mean(dtype=np.float64)
+            for greek, samples in self._malliavin_samples(G, higher_order=higher_order).items()
+        }
+
+    def _fused_estimates(self, N, backend, rng=None, sampling="pseudo", dtype=np.float64):
+        """Price and Malliavin greeks from the fused compiled kernel of the payoff
+
+        With pseudo-random float64 sampling the kernel draws the normals itself,
+        block by block from streams spawned from rng (a generator seeded from
+        numpy's global state if rng is None), so nothing per path is materialized.
+        Sobol points, scenario stores and float32 draws are drawn with draw_normals
+        and only these draws are materialized. S_T, the payoff and the weights
+        never leave the kernel's registers. Below FUSED_MIN_PATHS paths the numpy
+        estimators are faster and are used instead.
+
+        Args:
+            N (int): number of iterations for MC
+            backend (str): "numba"
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: backend should be in ["numpy", "numba"]
+
+        Returns:
+            dict or None: estimates of "price", "delta", "vega" and "gamma", None if the
+                          numpy fallback should be used
+        """
+        if backend != "numba":
+            raise Exception(f"Invalid backend {backend} not in ['numpy','numba']")
+        if self.scalar_payoff is None or not NUMBA_AVAILABLE or N < FUSED_MIN_PATHS:
+            return None
+
+        if (
+            sampling == "pseudo"
+            and np.dtype(dtype) == np.float64
+            and (rng is None or isinstance(rng, np.random.Generator))
+        ):
+            if rng is None:
+                rng = np.random.default_rng(np.random.randint(2 ** 31))
+            with stage("fused_kernel") as recorder:
+                recorder.count(N)
+                return fused_malliavin_generator(self.scalar_payoff, rng, N, self.params)
+
+        G = draw_normals(N, rng, sampling, dtype)
+        with stage("fused_kernel") as recorder:
+            recorder.track(G)
+            return fused_malliavin(self.scalar_payoff, G, self.params)
+
+    ##############################
+    # Localized Malliavin greeks #
+    ##############################
+
+    def _localized_samples(self, G, width, params__=None):
+        """Per-path samples of the localized Malliavin estimators
+
+        The payoff is split into its smooth approximation F, differentiated pathwise,
+        and the residual f - F, which vanishes outside the localization windows and
+        alone carries the Malliavin weights (Fournie et al.). Gamma of the smooth part
+        uses the pathwise derivative followed by the Malliavin delta weight.
+
+        Args:
+            G (np.ndarray): standard normal draws, one per path
+            width (float): half width of the localization windows around the kinks
+            params__ (dict, optional): model parameters, self.params if None. Defaults to None.
+
+        Raises:
+            Exception: the derivative needs a smooth_payoff
+
+        Returns:
+            dict: arrays of per-path samples for "price", "delta", "vega" and "gamma"
+        """
+        if self.smooth_payoff is None:
+            raise Exception(f"No smooth payoff available for {self.name} !")
+        if params__ is None:
+            params__ = self.params
+        r, T, S0, sigma = (
+            params__["interest_rate"],
+            params__["maturity"],
+            params__["price_0"],
+            params__["vol"],
+        )
+
+        S_T = self._terminal_price(G, params__)
+        discount = discount_factor(r, T, G.dtype)
+        payoff = self._evaluate_payoff(S_T, params__["strike"])
+        with stage("smooth_payoff") as recorder:
+            smooth, smooth_derivative = self.smooth_payoff(S_T, params__["strike"], width)
+            recorder.track(smooth)
+        residual = discount * (payoff - smooth)
+        pathwise = discount * smooth_derivative * S_T
+        weights = malliavin_weights(G, S0, sigma, T)
+
+        return {
+            "price": discount * payoff,
+            "delta": pathwise / S0 + residual * weights["delta"],
+            "vega": pathwise * (G * T ** 0.5 - sigma * T) + residual * weights["vega"],
+            "gamma": pathwise * (weights["delta"] - 1 / S0) / S0 + residual * weights["gamma"],
+        }
+
+    @instrumented
+    def greeks_malliavin_localized(
+        self, N, width, rng=None, sampling="pseudo", dtype=np.float64
+    ):
+        """Computes price, delta, vega and gamma with localized Malliavin estimators
+
+        Args:
+            N (int): number of iterations for MC
+            width (float): half width of the localization windows around the kinks, the
+                           smaller the closer to the pathwise method, the larger the closer
+                           to the plain Malliavin estimator
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: estimates of "price", "delta", "vega" and "gamma"
+        """
+        G = draw_normals(N, rng, sampling, dtype)
+
+        return {
+            greek: samples.mean(dtype=np.float64)
+            for greek, samples in self._localized_samples(G, width).items()
+        }
+
+    ######################
+    # Variance reduction #
+    ######################
+
+    def _control_samples(self, G, params__=None):
+        """Per-path control variates: the discounted underlying with the Malliavin weights
+
+        The discounted underlying is a martingale, so its price is S0 and its delta,
+        vega and gamma are 1, 0 and 0. Applying the same weights as the derivative
+        gives controls strongly correlated with each estimator and with known means.
+
+        Args:
+            G (np.ndarray): standard normal draws, one per path
+            params__ (dict, optional): model parameters, self.params if None. Defaults to None.
+
+        Returns:
+            (dict,dict): per-path control samples and their exact expectations, keyed
+                         by "price", "delta", "vega" and "gamma"
+        """
+        if params__ is None:
+            params__ = self.params
+        r, T, S0, sigma = (
+            params__["interest_rate"],
+            params__["maturity"],
+            params__["price_0"],
+            params__["vol"],
+        )
+
+        discounted_underlying = discount_factor(r, T, G.dtype) * self._terminal_price(G, params__)
+
+        controls = {"price": discounted_underlying}
+        for greek, weight in malliavin_weights(G, S0, sigma, T).items():
+            controls[greek] = discounted_underlying * weight
+
+        return controls, {"price": S0, "delta": 1.0, "vega": 0.0, "gamma": 0.0}
+
+    def _reduced_estimates(
+        self, N, params__, variance_reduction, rng=None, sampling="pseudo", dtype=np.float64
+    ):
+        """Price and Malliavin greeks with antithetic draws and/or control variates
+
+        Args:
+            N (int): number of iterations for MC
+            params__ (dict): model parameters, same keys as self.params
+            variance_reduction (str or list of str): "antithetic" pairs every draw G with -G,
+                                                     "control_variate" regresses each estimator
+                                                     on the controls of _control_samples
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: techniques should be in ["antithetic", "control_variate"]
+
+        Returns:
+            dict: estimates of "price", "delta", "vega" and "gamma"
+        """
+        techniques = (
+            [variance_reduction] if isinstance(variance_reduction, str) else list(variance_reduction)
+        )
+        for technique in techniques:
+            if technique not in ["antithetic", "control_variate"]:
+                raise Exception(
+                    f"Invalid variance reduction {technique} not in ['antithetic','control_variate']"
+                )
+
+        if "antithetic" in techniques:
+            G = draw_normals((N + 1) // 2, rng, sampling, dtype)
+            G = np.concatenate([G, -G])[:N]
+        else:
+            G = draw_normals(N, rng, sampling, dtype)
+
+        samples = self._malliavin_samples(G, params__)
+        if "control_variate" not in techniques:
+            return {greek: values.mean(dtype=np.float64) for greek, values in samples.items()}
+
+        controls, expectations = self._control_samples(G, params__)
+        return {
+            greek: control_variate_mean(values, controls[greek], expectations[greek])
+            for greek, values in samples.items()
+        }
+
+    ################################
+    # Randomized quasi Monte Carlo #
+    ################################
+
+    @instrumented
+    def randomized_qmc(self, estimator, n_scrambles=16, rng=None, **kwargs):
+        """Runs an estimator on independent scramblings of a Sobol sequence
+
+        The spread of the estimates across scramblings gives the error bar that a
+        single deterministic quasi Monte Carlo run cannot provide.
+
+        Args:
+            estimator (str): name of an estimator accepting rng and sampling, e.g.
+                             "price_monte_carlo", "greeks_difference_method" or "greeks_malliavin"
+            n_scrambles (int, optional): number of independent scramblings. Defaults to 16.
+            rng (np.random.Generator, optional): source of the scramblings, numpy's global
+                                                 state if None. Defaults to None.
+            **kwargs: arguments of the estimator (N, param__, ...)
+
+        Returns:
+            (float,float): average estimate and its standard error
+        """
+        estimates = np.array([
+            getattr(self, estimator)(rng=rng, sampling="sobol", **kwargs)
+            for _ in range(n_scrambles)
+        ])
+
+        return estimates.mean(), estimates.std(ddof=1) / np.sqrt(n_scrambles)
+
+    #########################
+    # Convergence of greeks #
+    #########################
+
+    @instrumented
+    def convergence_malliavin(self, checkpoints, rng=None, dtype=np.float64):
+        """Malliavin estimators as functions of the number of iterations
+
+        A single simulation of max(checkpoints) paths is run and the estimators are
+        read from running sums, instead of re-simulating from scratch for every N.
+
+        Args:
+            checkpoints (array-like of int): numbers of iterations at which estimators are returned
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: arrays of estimates of "price", "delta", "vega" and "gamma", one per checkpoint
+        """
+        G = draw_normals(int(np.max(checkpoints)), rng, dtype=dtype)
+
+        return {
+            greek: running_means(samples, checkpoints)
+            for greek, samples in self._malliavin_samples(G).items()
+        }
+
+    @instrumented
+    def convergence_difference(
+        self, checkpoints, epsilon, param__, order=1, crn=False, rng=None, dtype=np.float64
+    ):
+        """Finite difference estimator as a function of the number of iterations
+
+        Args:
+            checkpoints (array-like of int): numbers of iterations at which the estimator is returned
+            epsilon (float): epsilon used in finite diferent method for derivative estimation
+            param__ (str): name of parameter to which we compute greek
+            order (int, optional): order of derivative. Defaults to 1.
+            crn (bool, optional): if True, bumped and unbumped prices share the same normal
+                                  draws (common random numbers). Defaults to False.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            np.ndarray: estimates of the greek, one per checkpoint
+        """
+        N_max = int(np.max(checkpoints))
+        G = draw_normals(N_max if crn else (3, N_max), rng, dtype=dtype)
+        samples = self._difference_samples(G, epsilon, param__, order)[
+            (param__, epsilon, order)
+        ]
+
+        return running_means(samples, checkpoints)
+
+    ######################################
+    # Streaming estimators (bounded RAM) #
+    ######################################
+
+    def _stream(self, N, sampler, batch_size, rng=None, dtype=np.float64):
+        """Feeds per-path samples to running statistics block by block
+
+        Args:
+            N (int): total number of iterations
+            sampler (function): maps a block of standard normals to a dict of per-path samples
+            batch_size (int): number of paths simulated per block
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            RunningStats: running mean and variance of every estimator
+        """
+        stats = RunningStats()
+        remaining = N
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            stats.update(sampler(draw_normals(size, rng, dtype=dtype)))
+            remaining -= size
+
+        return stats
+
+    @instrumented
+    def greeks_malliavin_streaming(
+        self, N, batch_size=2 ** 16, rng=None, dtype=np.float64, higher_order=False
+    ):
+        """Price and Malliavin greeks with constant memory whatever the number of paths
+
+        Args:
+            N (int): number of iterations for MC
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**16.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+            higher_order (bool, optional): also estimates "vanna", "volga", "speed" and "rho".
+                                           Defaults to False.
+
+        Returns:
+            dict: (estimate, standard error) of "price", "delta", "vega" and "gamma"
+        """
+        sampler = lambda G: self._malliavin_samples(G, higher_order=higher_order)
+        return self._stream(N, sampler, batch_size, rng, dtype).result()
+
+    @instrumented
+    def greeks_difference_streaming(
+        self, N, epsilon, param__, order=1, batch_size=2 ** 16, rng=None, dtype=np.float64
+    ):
+        """Finite difference greeks (common random numbers) with constant memory
+
+        Args:
+            N (int): number of iterations
+            epsilon (float or list of floats): bump size(s)
+            param__ (str or list of str): name(s) of parameters in self.params to bump
+            order (int or list of ints, optional): order(s) of derivative in [1,2]. Defaults to 1.
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**16.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: (estimate, standard error) for each (param__, epsilon, order) key
+        """
+        return self._stream(
+            N,
+            lambda G: self._difference_samples(G, epsilon, param__, order),
+            batch_size,
+            rng,
+            dtype,
+        ).result()
+
+    ##################################
+    # Scenario ladder by reweighting #
+    ##################################
+
+    def _likelihood_ratios(self, G, spot, vol):
+        """Likelihood ratios of log S_T under shifted spots and vols against self.params
+
+        Under Black&Scholes log S_T is normal with mean log S0 + (r - sigma**2/2) T and
+        standard deviation sigma sqrt(T), so a path simulated with self.params is
+        reweighted exactly to any other spot and vol by the ratio of the two densities.
+
+        Args:
+            G (np.ndarray): standard normal draws of the base simulation, one per path
+            spot (np.ndarray): shifted prices of the underlying, a column of shape (n, 1)
+            vol (np.ndarray): shifted volatilities, a column of shape (n, 1)
+
+        Returns:
+            (np.ndarray,np.ndarray): ratios and standard normals G' of the paths under the
+                                     shifted scenarios, both of shape (n, len(G))
+        """
+        S0, r, sigma, T = (
+            self.params["price_0"],
+            self.params["interest_rate"],
+            self.params["vol"],
+            self.params["maturity"],
+        )
+        s, s_shifted = sigma * T ** 0.5, vol * T ** 0.5
+        shift = np.log(S0 / spot) - (sigma ** 2 - vol ** 2) / 2 * T
+
+        with stage("reweight") as recorder:
+            G_shifted = recorder.track((s / s_shifted) * G + shift / s_shifted)
+            ratios = np.square(G_shifted)
+            ratios -= G ** 2
+            ratios *= -0.5
+            np.exp(ratios, out=ratios)
+            ratios *= s / s_shifted
+            return recorder.track(ratios, count_paths=False), G_shifted
+
+    @instrumented
+    def scenario_ladder(
+        self,
+        N,
+        spot_shifts,
+        vol_shifts=(0.0,),
+        min_ess=0.1,
+        batch_size=2 ** 14,
+        rng=None,
+        sampling="pseudo",
+        dtype=np.float64,
+    ):
+        """Price and Malliavin greeks on a spot/vol grid from a single simulation
+
+        S_T and the payoff are simulated once with self.params, each grid point
+        reweights the same paths with its exact likelihood ratio and applies the
+        Malliavin weights of its own parameters, so a ladder costs one simulation
+        plus cheap arithmetic per point. The weights are polynomials of degree 2
+        in the shifted normals G', only the moments of G' against the reweighted
+        payoff are accumulated. The estimators stay unbiased but their
+        variance grows with the distance to the base scenario, the effective
+        sample size (sum w)**2 / sum w**2 measures it and points below min_ess * N
+        are flagged. The ratios have infinite variance once a shifted vol exceeds
+        sqrt(2) times the base vol, such points are always flagged. Paths are drawn
+        and reweighted block by block, so memory grows with batch_size times the
+        number of grid points but not with N. With sobol sampling each block is
+        a separately scrambled Sobol sample, batch_size should be a power of 2.
+
+        Args:
+            N (int): number of iterations for MC
+            spot_shifts (array-like): offsets of price_0
+            vol_shifts (array-like, optional): offsets of vol. Defaults to (0.0,).
+            min_ess (float, optional): minimal effective sample size, as a fraction of N, of
+                                       a reliable point. Defaults to 0.1.
+            batch_size (int, optional): number of paths drawn and reweighted per block.
+                                        Defaults to 2**14.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            sampling (str, optional): "pseudo" or "sobol" (scrambled Sobol, see draw_normals).
+                                      Defaults to "pseudo".
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: shifted spots and vols should be positive
+
+        Returns:
+            dict: "spot" and "vol" of the grid, then "price", "delta", "vega", "gamma",
+                  "ess" (effective sample size as a fraction of N) and "reliable", each
+                  an array of shape (len(spot_shifts), len(vol_shifts))
+        """
+        S0, r, sigma, T = (
+            self.params["price_0"],
+            self.params["interest_rate"],
+            self.params["vol"],
+            self.params["maturity"],
+        )
+        spot, vol = np.meshgrid(
+            S0 + np.asarray(spot_shifts, dtype=np.float64),
+            sigma + np.asarray(vol_shifts, dtype=np.float64),
+            indexing="ij",
+        )
+        if np.any(spot <= 0) or np.any(vol <= 0):
+            raise Exception("Shifted price_0 and vol should be positive")
+
+        # one column per grid point, paths along the last axis
+        spot__, vol__ = spot.reshape(-1, 1), vol.reshape(-1, 1)
+        sums = np.zeros((5, len(spot__)))
+
+        remaining = N
+        while remaining > 0:
+            G = draw_normals(min(batch_size, remaining), rng, sampling, dtype)
+            remaining -= len(G)
+            S_T = self._terminal_price(G, self.params)
+            discounted_payoff = discount_factor(r, T, G.dtype) * self._evaluate_payoff(
+                S_T, self.params["strike"]
+            )
+
+            ratios, G_shifted = self._likelihood_ratios(G, spot__, vol__)
+            sums[3] += ratios.sum(axis=-1, dtype=np.float64)
+            sums[4] += np.einsum("ij,ij->i", ratios, ratios, dtype=np.float64)
+            # moments E[f w G'^k] for k = 0, 1, 2
+            ratios *= discounted_payoff
+            sums[0] += ratios.sum(axis=-1, dtype=np.float64)
+            ratios *= G_shifted
+            sums[1] += ratios.sum(axis=-1, dtype=np.float64)
+            sums[2] += np.einsum("ij,ij->i", ratios, G_shifted, dtype=np.float64)
+
+        price, first, second = sums[:3] / N
+        vol__, spot__ = vol__[:, 0], spot__[:, 0]
+        vega = second / vol__ - first * T ** 0.5 - price / vol__
+        ess = sums[3] ** 2 / sums[4] / N
+
+        ladder = {
+            "spot": spot,
+            "vol": vol,
+            "price": price,
+            "delta": first / (spot__ * vol__ * T ** 0.5),
+            "vega": vega,
+            "gamma": vega / (spot__ * spot__ * vol__ * T),
+            "ess": ess,
+            "reliable": (ess >= min_ess) & (vol__ < 2 ** 0.5 * sigma),
+        }
+
+        return {key: value.reshape(spot.shape) for key, value in ladder.items()}
+
+    ########################################
+    # Adaptive number of Monte Carlo paths #
+    ########################################
+
+    @instrumented
+    def greeks_adaptive(
+        self,
+        greek,
+        method="malliavin",
+        abs_tol=None,
+        rel_tol=None,
+        time_budget=None,
+        max_paths=None,
+        batch_size=2 ** 14,
+        rng=None,
+        dtype=np.float64,
+        **kwargs,
+    ):
+        """Simulates by blocks until a greek reaches a target standard error
+
+        Simulation stops as soon as the standard error is below abs_tol, or below
+        rel_tol times the absolute estimate, or when the wall-clock budget or the
+        maximal number of paths is exhausted.
+
+        Args:
+            greek (str): "price", "delta", "vega" or "gamma" for methods "malliavin" and
+                         "localized", ignored for "difference"
+            method (str, optional): "malliavin", "localized" (needs width in kwargs) or
+                                    "difference" (common random numbers, needs epsilon,
+                                    param__ and order in kwargs). Defaults to "malliavin".
+            abs_tol (float, optional): target absolute standard error. Defaults to None.
+            rel_tol (float, optional): target standard error relative to the estimate. Defaults to None.
+            time_budget (float, optional): wall-clock budget in seconds. Defaults to None.
+            max_paths (int, optional): maximal number of paths. Defaults to None.
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**14.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+            **kwargs: arguments of the estimator (width, or epsilon, param__ and order)
+
+        Raises:
+            Exception: at least one stopping criterion is needed
+            Exception: batch_size and max_paths should be at least 2
+            Exception: method should be in ["malliavin", "localized", "difference"]
+
+        Returns:
+            dict: "estimate", "std_error", "n_paths" and "converged" (tolerance reached)
+        """
+        if abs_tol is None and rel_tol is None and time_budget is None and max_paths is None:
+            raise Exception("At least one of abs_tol, rel_tol, time_budget, max_paths is needed")
+        if batch_size < 2 or (max_paths is not None and max_paths < 2):
+            raise Exception(
+                f"Invalid batch_size {batch_size} or max_paths {max_paths}, a standard error "
+                "needs at least 2 paths"
+            )
+
+        if method == "malliavin":
+            sampler, key = self._malliavin_samples, greek
+        elif method == "localized":
+            sampler, key = lambda G: self._localized_samples(G, kwargs["width"]), greek
+        elif method == "difference":
+            sampler = lambda G: self._difference_samples(
+                G, kwargs["epsilon"], kwargs["param__"], kwargs.get("order", 1)
+            )
+            key = (kwargs["param__"], kwargs["epsilon"], kwargs.get("order", 1))
+        else:
+            raise Exception(
+                f"Invalid method {method} not in ['malliavin','localized','difference']"
+            )
+
+        start_time = time.perf_counter()
+        stats = RunningStats()
+        converged = False
+
+        while max_paths is None or stats.count < max_paths:
+            size = batch_size if max_paths is None else min(batch_size, max_paths - stats.count)
+            stats.update({key: sampler(draw_normals(size, rng, dtype=dtype))[key]})
+
+            estimate, std_error = stats.mean[key], stats.std_error(key)
+            converged = (abs_tol is not None and std_error <= abs_tol) or (
+                rel_tol is not None and std_error <= rel_tol * abs(estimate)
+            )
+            if converged or (
+                time_budget is not None and time.perf_counter() - start_time >= time_budget
+            ):
+                break
+
+        return {
+            "estimate": estimate,
+            "std_error": std_error,
+            "n_paths": stats.count,
+            "converged": bool(converged),
+        }
+
+
+####################
+# Control variates #
+####################
+
+
+def control_variate_mean(X, Y, expectation):
+    """Control variate estimator of E[X] with a control Y of known expectation
+
+    Args:
+        X (np.ndarray): per-path samples of the estimator
+        Y (np.ndarray): per-path samples of the control
+        expectation (float): exact value of E[Y]
+
+    Returns:
+        float: mean of X - beta * (Y - E[Y]) with the variance minimizing beta
+    """
+    X_mean, Y_mean = X.mean(dtype=np.float64), Y.mean(dtype=np.float64)
+    Y_centered = Y - Y_mean
+    var_Y = (Y_centered ** 2).mean()
+    if var_Y == 0:
+        return X_mean
+    beta = ((X - X_mean) * Y_centered).mean() / var_Y
+
+    return X_mean - beta * (Y_mean - expectation)
+
+
+###################
+# Running average #
+###################
+
+
+def running_means(samples, checkpoints):
+    """Running Monte Carlo averages of per-path samples taken at given path counts
+
+    Args:
+        samples (np.ndarray): per-path samples
+        checkpoints (array-like of int): path counts at which the average is read
+
+    Returns:
+        np.ndarray: average of the first n samples for each n in checkpoints
+    """
+    checkpoints = np.asarray(checkpoints)
+    return np.cumsum(samples, dtype=np.float64)[checkpoints - 1] / checkpoints
+
 
 if __name__ == "__main__":
     pass
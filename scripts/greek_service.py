@@ -0,0 +1,326 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: greek_service.py                           #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                      asyncio micro-batching greek service                      #
+##################################################################################
+
+############
+# packages #
+############
+
+from portfolio import check_contract, price_contracts
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import asyncio
+import time
+
+
+#######################
+# Greek Service Class #
+#######################
+
+
+class GreekService:
+    """Asyncio front end pricing concurrent greek requests in micro-batches
+
+    Requests are queued and those already waiting when a batch starts are
+    coalesced (up to max_batch, for at most `window` seconds while requests
+    keep arriving) and priced together by price_contracts over one shared
+    normal sample. A batch is flushed as soon as the queue is idle, so a lone
+    request does not wait for the window. Batches run in arrival order in an
+    executor so the event loop keeps accepting requests, and each caller's
+    future is resolved with its own result. Every batch draws from its own
+    stream spawned from one np.random.SeedSequence.
+    """
+
+    ###############
+    # Constructor #
+    ###############
+
+    def __init__(
+        self,
+        derivative,
+        N=2 ** 16,
+        window=0.002,
+        max_batch=32,
+        batch_size=2 ** 14,
+        seed=0,
+        executor=None,
+        dtype=np.float64,
+    ):
+        """Constructor
+
+        Args:
+            derivative (EuropeanDerivative): template giving the payoff and default parameters
+            N (int, optional): number of iterations for MC of each batch. Defaults to 2**16.
+            window (float, optional): maximal seconds spent collecting requests after the
+                                      first one of a batch. Defaults to 0.002.
+            max_batch (int, optional): maximal number of requests in a batch. Defaults to 32.
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**14.
+            seed (int, optional): root seed of the random streams. Defaults to 0.
+            executor (concurrent.futures.Executor, optional): executor running the batches,
+                                      a single worker thread if None, so that a batch is not
+                                      slowed down by the later ones. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+        """
+        self.derivative = derivative
+        self.N = N
+        self.window = window
+        self.max_batch = max_batch
+        self.batch_size = batch_size
+        self.executor = executor
+        self.dtype = dtype
+        self.n_batches = 0
+        self.__seeds = np.random.SeedSequence(seed)
+        self.__queue = None
+        self.__collector = None
+        self.__running = set()
+        self.__stopping = False
+        self.__own_executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        return False
+
+    async def start(self):
+        """Starts collecting requests on the running event loop
+        """
+        if self.executor is None:
+            self.__own_executor = ThreadPoolExecutor(max_workers=1)
+        self.__queue = asyncio.Queue()
+        self.__stopping = False
+        self.__collector = asyncio.get_running_loop().create_task(self.__collect())
+
+    async def stop(self):
+        """Prices the requests queued so far and stops the service
+
+        New requests are rejected as soon as stop is called.
+        """
+        if self.__collector is None or self.__stopping:
+            return
+        self.__stopping = True
+        self.__queue.put_nowait(None)
+        await self.__collector
+        if self.__running:
+            await asyncio.gather(*self.__running)
+        while not self.__queue.empty():
+            request = self.__queue.get_nowait()
+            if request is not None and not request[1].done():
+                request[1].set_exception(Exception("GreekService is stopped"))
+        if self.__own_executor is not None:
+            self.__own_executor.shutdown()
+            self.__own_executor = None
+        self.__collector = None
+
+    ###########
+    # Request #
+    ###########
+
+    async def greeks(self, **contract):
+        """Price and Malliavin greeks of one contract
+
+        Args:
+            **contract: parameter overrides of the template (e.g. strike=110, vol=0.25),
+                        same keys as derivative.params
+
+        Raises:
+            Exception: the service should be running (started and not stopping)
+            Exception: overridden parameters should be keys of derivative.params
+            Exception: overridden values should be numbers shaped as the template's
+            Exception: overridden values should be finite, and positive but the interest rate
+
+        Returns:
+            dict: (estimate, standard error) of "price", "delta", "vega" and "gamma"
+        """
+        if self.__collector is None or self.__stopping:
+            raise Exception("GreekService is not running")
+        contract = self.__validate(contract)
+
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((contract, future))
+        return await future
+
+    def __validate(self, contract):
+        """Checks the overrides of a request and converts them to floats
+
+        A malformed request is rejected before it is queued, so it cannot fail
+        the batch of the requests coalesced with it.
+
+        Args:
+            contract (dict): parameter overrides of the template
+
+        Raises:
+            Exception: overridden parameters should be keys of derivative.params
+            Exception: overridden values should be numbers shaped as the template's
+            Exception: overridden values should be finite, and positive but the interest rate
+
+        Returns:
+            dict: overrides as floats, or tuples of floats for tuple strikes
+        """
+        validated = {}
+        for key, value in contract.items():
+            if key not in self.derivative.params:
+                raise Exception(f"Invalid parameter {key} not in {list(self.derivative.params)}")
+            default = self.derivative.params[key]
+            try:
+                if isinstance(default, tuple):
+                    value = tuple(float(item) for item in value)
+                    if len(value) != len(default):
+                        raise ValueError
+                else:
+                    value = float(value)
+            except (TypeError, ValueError):
+                raise Exception(f"Invalid value {value!r} of {key}, expected {default!r}-like")
+            validated[key] = value
+        check_contract(validated)
+
+        return validated
+
+    ##################
+    # Micro-batching #
+    ##################
+
+    async def __collect(self):
+        """Groups queued requests into batches and dispatches them until stopped
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self.__queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    request = self.__queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    # let the ready coroutines enqueue their requests, flush once idle
+                    await asyncio.sleep(0)
+                    if self.__queue.empty() or loop.time() >= deadline:
+                        break
+                    continue
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            task = loop.create_task(self.__dispatch(batch))
+            self.__running.add(task)
+            task.add_done_callback(self.__running.discard)
+
+    async def __dispatch(self, batch, seed=None):
+        """Prices a batch in the executor and resolves the futures of its requests
+
+        If the batch fails, its requests are priced one by one on the batch's
+        stream. Contracts of a batch share the same draws, so the valid requests
+        get exactly the results they would have had in the batch and only the
+        failing ones get the error.
+
+        Args:
+            batch (list of (dict, asyncio.Future)): contracts and futures of the requests
+            seed (np.random.SeedSequence, optional): seed of the batch's stream, spawned
+                                                     from the root seed if None. Defaults to None.
+        """
+        if seed is None:
+            seed = self.__seeds.spawn(1)[0]
+            self.n_batches += 1
+        contracts = [contract for contract, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor or self.__own_executor,
+                price_contracts,
+                self.derivative,
+                contracts,
+                self.N,
+                self.batch_size,
+                np.random.default_rng(seed),
+                self.dtype,
+            )
+        except Exception as error:
+            if len(batch) > 1:
+                await asyncio.gather(*[self.__dispatch([request], seed) for request in batch])
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+########
+#-Main-#
+########
+
+if __name__ == "__main__":
+
+    from european_call import EuropeanCall
+
+    #####################
+    # General Variables #
+    #####################
+
+    N = 2 ** 15
+    n_requests = 256
+    rng = np.random.default_rng(0)
+    strikes = rng.uniform(80, 120, n_requests)
+    Call = EuropeanCall(100, 100, 0.05, 0.2, 1)
+
+    ##########################
+    # In-process load client #
+    ##########################
+
+    async def request(price, **contract):
+        start_time = time.perf_counter()
+        await price(**contract)
+        return time.perf_counter() - start_time
+
+    async def one_simulation_per_request(**contract):
+        params__ = dict(Call.params, **contract)
+        derivative = EuropeanCall(
+            params__["price_0"],
+            params__["strike"],
+            params__["interest_rate"],
+            params__["vol"],
+            params__["maturity"],
+        )
+        return await asyncio.get_running_loop().run_in_executor(
+            None, lambda: derivative.greeks_malliavin_streaming(N, rng=np.random.default_rng())
+        )
+
+    async def load(price):
+        start_time = time.perf_counter()
+        latencies = await asyncio.gather(*[request(price, strike=K) for K in strikes])
+        return time.perf_counter() - start_time, np.array(latencies)
+
+    async def main():
+        reports = {"one simulation per request": await load(one_simulation_per_request)}
+        async with GreekService(Call, N=N) as service:
+            reports["micro-batched service"] = await load(service.greeks)
+        print(f"{n_requests} concurrent requests, {N} paths each ({service.n_batches} batches)")
+        for name, (elapsed, latencies) in reports.items():
+            print("*" * 50)
+            print(name)
+            print(f"- throughput : {n_requests / elapsed:.0f} requests/s")
+            print(f"- p50 latency : {1000 * np.percentile(latencies, 50):.1f} ms")
+            print(f"- p99 latency : {1000 * np.percentile(latencies, 99):.1f} ms")
+
+    asyncio.run(main())
+
+###############
+# end-of-code #
+###############
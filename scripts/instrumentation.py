@@ -0,0 +1,350 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                         File Name: instrumentation.py                          #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                       profiling hooks of the estimators                        #
+##################################################################################
+
+############
+# packages #
+############
+
+import functools
+import json
+import time
+
+
+###################
+# Active profiler #
+###################
+
+_ACTIVE = None
+
+
+class _NullStage:
+    """Stage recorder used when no profiler is active, does nothing
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def track(self, array, count_paths=True):
+        """Returns the array untouched
+
+        Args:
+            array (np.ndarray): array produced by the stage
+            count_paths (bool, optional): ignored. Defaults to True.
+
+        Returns:
+            np.ndarray: the same array
+        """
+        return array
+
+    def count(self, paths):
+        """Does nothing
+
+        Args:
+            paths (int): ignored
+        """
+
+
+_NULL_STAGE = _NullStage()
+
+
+##################
+# Profiler Class #
+##################
+
+
+class Profiler:
+    """Records where the time goes inside the Monte Carlo estimators
+
+    Used as a context manager: while active, every instrumented estimator call
+    and every stage inside it (normal draws, exponentiation, payoff, weights)
+    accumulates its wall-clock time, the number of paths it handled, the batch
+    sizes and the bytes of the arrays it allocated. Stages are attributed to
+    the innermost running estimator. The profiler only sees its own process,
+    pool workers report back through profiled_call and merge_worker_stats.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+        self.estimators = {}
+        self.__stack = []
+        self.__previous = None
+
+    def __enter__(self):
+        global _ACTIVE
+        self.__previous, _ACTIVE = _ACTIVE, self
+        return self
+
+    def __exit__(self, *exc):
+        global _ACTIVE
+        _ACTIVE = self.__previous
+        return False
+
+    def __entry(self, estimator):
+        """Statistics of one estimator, created on first use
+
+        Args:
+            estimator (str): name of the estimator
+
+        Returns:
+            dict: statistics of the estimator
+        """
+        return self.estimators.setdefault(
+            estimator, {"calls": 0, "seconds": 0.0, "stages": {}}
+        )
+
+    def _start_estimator(self, estimator):
+        """Marks the start of an estimator call
+
+        Args:
+            estimator (str): name of the estimator
+
+        Returns:
+            float: start time of the call
+        """
+        self.__stack.append(estimator)
+        return time.perf_counter()
+
+    def _stop_estimator(self, estimator, start_time):
+        """Records the end of an estimator call
+
+        Args:
+            estimator (str): name of the estimator
+            start_time (float): start time of the call
+        """
+        entry = self.__entry(estimator)
+        entry["calls"] += 1
+        entry["seconds"] += time.perf_counter() - start_time
+        self.__stack.pop()
+
+    def _record_stage(self, stage, seconds, paths, batches, nbytes):
+        """Accumulates the statistics of a stage in the innermost running estimator
+
+        Args:
+            stage (str): name of the stage
+            seconds (float): wall-clock time of the stage
+            paths (int): number of paths handled
+            batches (list of int): batch sizes handled
+            nbytes (int): bytes of the arrays produced
+        """
+        estimator = self.__stack[-1] if self.__stack else "<none>"
+        stages = self.__entry(estimator)["stages"]
+        entry = stages.setdefault(
+            stage, {"calls": 0, "seconds": 0.0, "paths": 0, "batch_sizes": [], "bytes": 0}
+        )
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["paths"] += paths
+        entry["batch_sizes"] += batches
+        entry["bytes"] += nbytes
+
+    def _merge(self, estimators):
+        """Adds the statistics recorded by another profiler, e.g. in a worker process
+
+        Stages recorded outside any estimator are attributed to the innermost
+        estimator running here, so shards of a parallel run land under the call
+        that dispatched them.
+
+        Args:
+            estimators (dict): statistics of the other profiler, see to_dict
+        """
+        for estimator, other in estimators.items():
+            if estimator == "<none>" and self.__stack:
+                estimator = self.__stack[-1]
+            entry = self.__entry(estimator)
+            entry["calls"] += other["calls"]
+            entry["seconds"] += other["seconds"]
+            for stage, stats in other["stages"].items():
+                target = entry["stages"].setdefault(
+                    stage, {"calls": 0, "seconds": 0.0, "paths": 0, "batch_sizes": [], "bytes": 0}
+                )
+                for key in ["calls", "seconds", "paths", "batch_sizes", "bytes"]:
+                    target[key] += stats[key]
+
+    def to_dict(self):
+        """Aggregated statistics
+
+        Returns:
+            dict: calls and seconds of each estimator with the calls, seconds, paths,
+                  batch sizes and allocated bytes of each of its stages
+        """
+        return json.loads(json.dumps(self.estimators))
+
+    def to_json(self, path=None):
+        """Aggregated statistics as json
+
+        Args:
+            path (str, optional): file to write, only returned if None. Defaults to None.
+
+        Returns:
+            str: json dump of to_dict()
+        """
+        dump = json.dumps(self.estimators, indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(dump)
+        return dump
+
+
+class _Stage:
+    """Times one stage and tracks the arrays it produces
+    """
+
+    def __init__(self, profiler, name):
+        """Constructor
+
+        Args:
+            profiler (Profiler): profiler receiving the statistics
+            name (str): name of the stage
+        """
+        self.profiler = profiler
+        self.name = name
+        self.paths = 0
+        self.batches = []
+        self.nbytes = 0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record_stage(
+            self.name,
+            time.perf_counter() - self.start_time,
+            self.paths,
+            self.batches,
+            self.nbytes,
+        )
+        return False
+
+    def track(self, array, count_paths=True):
+        """Counts the paths and bytes of an array produced by the stage
+
+        Args:
+            array (np.ndarray): array produced by the stage, paths along the last axis
+            count_paths (bool, optional): if False only the bytes are counted, for
+                                          further arrays over the same paths. Defaults to True.
+
+        Returns:
+            np.ndarray: the same array
+        """
+        if count_paths:
+            size = array.shape[-1] if array.ndim else 1
+            self.paths += size
+            self.batches.append(size)
+        self.nbytes += array.nbytes
+        return array
+
+    def count(self, paths):
+        """Counts paths handled by the stage without materializing them
+
+        Args:
+            paths (int): number of paths, e.g. drawn inside a compiled kernel
+        """
+        self.paths += paths
+        self.batches.append(paths)
+
+
+###################
+# Instrumentation #
+###################
+
+
+def stage(name):
+    """Context manager timing a stage of the running estimator
+
+    Args:
+        name (str): name of the stage, e.g. "rng", "exp", "payoff" or "weights"
+
+    Returns:
+        context manager: its track(array) method counts the paths and bytes of an array
+    """
+    if _ACTIVE is None:
+        return _NULL_STAGE
+    return _Stage(_ACTIVE, name)
+
+
+def profiled_call(profile, function, *args):
+    """Runs a function, under a fresh Profiler if profile is True
+
+    Profilers only see their own process, so pool workers run their task
+    through this function and the parent merges the returned statistics with
+    merge_worker_stats.
+
+    Args:
+        profile (bool): whether the calling process is profiling, see profiling
+        function (function): picklable task of the worker
+        *args: arguments of the task
+
+    Returns:
+        (object,dict): result of the task and statistics of its profiler, None if not profiled
+    """
+    if not profile:
+        return function(*args), None
+    with Profiler() as profiler:
+        result = function(*args)
+    return result, profiler.to_dict()
+
+
+def profiling():
+    """Whether a Profiler is active in this process
+
+    Returns:
+        bool: True inside a Profiler context
+    """
+    return _ACTIVE is not None
+
+
+def merge_worker_stats(estimators):
+    """Adds the statistics of a worker to the active Profiler, if any
+
+    Args:
+        estimators (dict or None): statistics returned by profiled_call
+    """
+    if _ACTIVE is not None and estimators is not None:
+        _ACTIVE._merge(estimators)
+
+
+def instrumented(method):
+    """Decorator recording the calls and the wall-clock time of an estimator
+
+    Args:
+        method (function): estimator method
+
+    Returns:
+        function: the method, recorded when a Profiler is active
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _ACTIVE is None:
+            return method(*args, **kwargs)
+        profiler = _ACTIVE
+        start_time = profiler._start_estimator(name)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profiler._stop_estimator(name, start_time)
+
+    return wrapper
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,220 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                             File Name: kernels.py                              #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                    optional numba fused Monte Carlo kernels                    #
+##################################################################################
+
+############
+# packages #
+############
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import os
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+NUMBA_AVAILABLE = numba is not None
+
+# below one block of fused_malliavin_generator the kernel runs on a single thread
+# and the vectorized numpy estimators are as fast, so they are used instead
+FUSED_MIN_PATHS = 2 ** 16
+
+
+#################
+# Fused kernels #
+#################
+
+# compiled kernels, one pair per scalar payoff
+_KERNELS = {}
+
+
+def _compile_kernel(scalar_payoff):
+    """Compiles the fused Malliavin kernels of a payoff
+
+    The kernels map each normal draw to S_T, the discounted payoff and the
+    Malliavin weights, and accumulate the sums of the price, delta and vega
+    samples in float64 registers, so no per-path temporary is ever allocated.
+    The first one reads given draws and splits them across threads with
+    numba's parallel reduction. The second one draws the normals itself from a
+    np.random.Generator and releases the GIL, so several of them run on their
+    own streams in parallel threads.
+
+    Args:
+        scalar_payoff (function): payoff of one terminal price, called as
+                                  scalar_payoff(x, K) with K a float64 array of strikes
+
+    Returns:
+        (function,function): kernel(G, S0, K, r, sigma, T) and
+                             kernel_generator(generator, n, S0, K, r, sigma, T), both
+                             returning the sums of the samples as a float64 array
+    """
+    payoff = numba.njit(inline="always")(scalar_payoff)
+
+    @numba.njit(parallel=True)
+    def kernel(G, S0, K, r, sigma, T):
+        sqrt_T = np.sqrt(T)
+        drift = (r - 0.5 * sigma * sigma) * T
+        sigma_sqrt_T = sigma * sqrt_T
+        discount = np.exp(-r * T)
+
+        price, delta, vega = 0.0, 0.0, 0.0
+        for i in numba.prange(G.shape[0]):
+            z = G[i]
+            discounted_payoff = discount * payoff(S0 * np.exp(drift + sigma_sqrt_T * z), K)
+            price += discounted_payoff
+            delta += discounted_payoff * z
+            vega += discounted_payoff * (z * z / sigma - z * sqrt_T - 1 / sigma)
+
+        sums = np.empty(3)
+        sums[0], sums[1], sums[2] = price, delta, vega
+        return sums
+
+    @numba.njit(nogil=True)
+    def kernel_generator(generator, n, S0, K, r, sigma, T):
+        sqrt_T = np.sqrt(T)
+        drift = (r - 0.5 * sigma * sigma) * T
+        sigma_sqrt_T = sigma * sqrt_T
+        discount = np.exp(-r * T)
+
+        price, delta, vega = 0.0, 0.0, 0.0
+        for _ in range(n):
+            z = generator.standard_normal()
+            discounted_payoff = discount * payoff(S0 * np.exp(drift + sigma_sqrt_T * z), K)
+            price += discounted_payoff
+            delta += discounted_payoff * z
+            vega += discounted_payoff * (z * z / sigma - z * sqrt_T - 1 / sigma)
+
+        sums = np.empty(3)
+        sums[0], sums[1], sums[2] = price, delta, vega
+        return sums
+
+    return kernel, kernel_generator
+
+
+def _kernels(scalar_payoff):
+    """Compiled kernels of a payoff, compiled on first use
+
+    Args:
+        scalar_payoff (function): payoff of one terminal price, see _compile_kernel
+
+    Returns:
+        (function,function): kernels of the payoff, see _compile_kernel
+    """
+    if scalar_payoff not in _KERNELS:
+        _KERNELS[scalar_payoff] = _compile_kernel(scalar_payoff)
+    return _KERNELS[scalar_payoff]
+
+
+def _kernel_arguments(params__):
+    """Model parameters as the scalar arguments of the kernels
+
+    Args:
+        params__ (dict): model parameters, same keys as EuropeanDerivative.params
+
+    Returns:
+        tuple: S0, K (float64 array), r, sigma and T
+    """
+    return (
+        float(params__["price_0"]),
+        np.atleast_1d(np.asarray(params__["strike"], dtype=np.float64)),
+        float(params__["interest_rate"]),
+        float(params__["vol"]),
+        float(params__["maturity"]),
+    )
+
+
+def _estimates(sums, N, params__):
+    """Price, delta, vega and gamma from the sums of the kernel samples
+
+    Args:
+        sums (np.ndarray): sums of the price, delta and vega samples
+        N (int): number of paths
+        params__ (dict): model parameters, same keys as EuropeanDerivative.params
+
+    Returns:
+        dict: estimates of "price", "delta", "vega" and "gamma"
+    """
+    S0, _, _, sigma, T = _kernel_arguments(params__)
+    price, delta, vega = sums / N
+    return {
+        "price": price,
+        "delta": delta / (S0 * sigma * np.sqrt(T)),
+        "vega": vega,
+        "gamma": vega / (S0 * S0 * sigma * T),
+    }
+
+
+def fused_malliavin(scalar_payoff, G, params__):
+    """Price, delta, vega and gamma with the fused Malliavin kernel of a payoff on given draws
+
+    Used when the draws cannot be generated inside the kernel (Sobol points,
+    scenario stores).
+
+    Args:
+        scalar_payoff (function): payoff of one terminal price, see _compile_kernel
+        G (np.ndarray): standard normal draws, one per path
+        params__ (dict): model parameters, same keys as EuropeanDerivative.params
+
+    Returns:
+        dict or None: estimates of "price", "delta", "vega" and "gamma", None when
+                      numba is not installed
+    """
+    if not NUMBA_AVAILABLE:
+        return None
+    kernel, _ = _kernels(scalar_payoff)
+    sums = kernel(np.ascontiguousarray(G), *_kernel_arguments(params__))
+
+    return _estimates(sums, len(G), params__)
+
+
+def fused_malliavin_generator(scalar_payoff, rng, N, params__, block_size=2 ** 16):
+    """Price, delta, vega and gamma with the fused Malliavin kernel drawing its own normals
+
+    The paths are split in blocks of block_size, each block draws from its own
+    stream spawned from rng and blocks run in a thread pool, so the normals are
+    never materialized and the estimates only depend on rng and N, not on the
+    number of threads.
+
+    Args:
+        scalar_payoff (function): payoff of one terminal price, see _compile_kernel
+        rng (np.random.Generator): generator whose spawned streams feed the blocks
+        N (int): number of paths
+        params__ (dict): model parameters, same keys as EuropeanDerivative.params
+        block_size (int, optional): number of paths per stream. Defaults to 2**16.
+
+    Returns:
+        dict or None: estimates of "price", "delta", "vega" and "gamma", None when
+                      numba is not installed
+    """
+    if not NUMBA_AVAILABLE:
+        return None
+    _, kernel_generator = _kernels(scalar_payoff)
+    arguments = _kernel_arguments(params__)
+    sizes = [min(block_size, N - start) for start in range(0, N, block_size)]
+    streams = rng.spawn(len(sizes))
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        partials = list(
+            pool.map(lambda stream, n: kernel_generator(stream, n, *arguments), streams, sizes)
+        )
+
+    return _estimates(np.sum(partials, axis=0), N, params__)
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,500 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                         File Name: model_derivative.py                         #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                       heston and local volatility models                       #
+##################################################################################
+
+############
+# packages #
+############
+
+from abstract_derivative import Derivative
+from european_derivative import bump_param, draw_normals, scenario_column
+from instrumentation import instrumented, stage
+from running_stats import RunningStats
+from scipy.special import ndtr
+import numpy as np
+
+
+################
+# Heston Model #
+################
+
+
+class HestonModel:
+    """Heston stochastic volatility model
+
+    dS_t = r S_t dt + sqrt(v_t) S_t dW^S_t,
+    dv_t = kappa (theta - v_t) dt + xi sqrt(v_t) dW^v_t,   d<W^S, W^v>_t = rho dt.
+
+    The log price is advanced with its conditional gaussian part driven by a
+    brownian motion W_perp independent of the variance, log S_{i+1} = log S_i
+    + drift_i + s_i Z_perp_i, so the tangent process dS_T/dS0 = S_T/S0 is exact
+    and the Malliavin derivative of S_T along Z_perp_i is S_T s_i. Choosing
+    the direction s_i / sum_j s_j**2 gives the delta weight
+    sum_i s_i Z_perp_i / (S0 sum_i s_i**2), accumulated along the path.
+    """
+
+    def __init__(self, v0, kappa, theta, xi, rho, scheme="euler"):
+        """Constructor
+
+        Args:
+            v0 (float): initial variance
+            kappa (float): speed of mean reversion of the variance
+            theta (float): long run variance
+            xi (float): volatility of the variance
+            rho (float): correlation between the price and the variance, in (-1, 1)
+            scheme (str, optional): "euler" (full truncation) or "qe" (Andersen's quadratic
+                                    exponential scheme for the variance). Defaults to "euler".
+
+        Raises:
+            Exception: scheme should be in ["euler", "qe"]
+        """
+        if scheme not in ["euler", "qe"]:
+            raise Exception(f"Invalid scheme {scheme} not in ['euler','qe']")
+        self.name = "heston"
+        self.params = {"v0": v0, "kappa": kappa, "theta": theta, "xi": xi, "rho": rho}
+        self.scheme = scheme
+
+    def __next_variance(self, v, Z, dt):
+        """Advances the variance by one step of the quadratic exponential scheme
+
+        Args:
+            v (np.ndarray): variance at the beginning of the step
+            Z (np.ndarray): standard normal draws driving the variance
+            dt (float): time step
+
+        Returns:
+            np.ndarray: variance at the end of the step
+        """
+        kappa, theta, xi = self.params["kappa"], self.params["theta"], self.params["xi"]
+        decay = np.exp(-kappa * dt)
+        m = theta + (v - theta) * decay
+        s2 = v * xi ** 2 * decay * (1 - decay) / kappa + theta * xi ** 2 * (1 - decay) ** 2 / (
+            2 * kappa
+        )
+        psi = s2 / m ** 2
+
+        # quadratic branch for psi <= 1.5, exponential branch with a mass at 0 above
+        quadratic = psi <= 1.5
+        inverse_psi = 2 / np.where(quadratic, psi, 1.5)
+        b2 = inverse_psi - 1 + np.sqrt(inverse_psi) * np.sqrt(inverse_psi - 1)
+        p = (psi - 1) / (psi + 1)
+        U = ndtr(Z).astype(Z.dtype, copy=False)
+        exponential = np.where(
+            U > p, np.log(np.maximum((1 - p) / np.maximum(1 - U, 1e-300), 1.0)) * m / (1 - p), 0.0
+        )
+
+        return np.where(quadratic, m / (1 + b2) * (np.sqrt(b2) + Z) ** 2, exponential)
+
+    def _simulate(self, S0, r, T, n_steps, N, rng=None, dtype=np.float64):
+        """Simulates S_T and the Malliavin delta weight in one pass
+
+        Args:
+            S0 (float or np.ndarray): price of the underlying at t=0, (n,1) columns share paths
+            r (float or np.ndarray): interest rate
+            T (float): maturity
+            n_steps (int): number of time steps
+            N (int): number of paths
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            (np.ndarray,np.ndarray): terminal prices S_T and delta weights, one per path
+        """
+        v0, kappa, theta, xi, rho = (
+            self.params["v0"],
+            self.params["kappa"],
+            self.params["theta"],
+            self.params["xi"],
+            self.params["rho"],
+        )
+        dt = T / n_steps
+        log_S = np.log(S0)
+        v = np.full(N, v0, dtype=dtype)
+        score, information = 0.0, 0.0
+
+        for _ in range(n_steps):
+            Z_v = draw_normals(N, rng, dtype=dtype)
+            Z_perp = draw_normals(N, rng, dtype=dtype)
+            if self.scheme == "euler":
+                v_plus = np.maximum(v, 0.0)
+                s2 = (1 - rho ** 2) * v_plus * dt
+                log_S = log_S + (r - v_plus / 2) * dt + rho * np.sqrt(v_plus * dt) * Z_v
+                v = v + kappa * (theta - v_plus) * dt + xi * np.sqrt(v_plus * dt) * Z_v
+            else:
+                v_next = self.__next_variance(v, Z_v, dt)
+                # Andersen's K0..K4 with central weights gamma1 = gamma2 = 1/2
+                s2 = (1 - rho ** 2) * (v + v_next) * dt / 2
+                log_S = (
+                    log_S
+                    + r * dt
+                    - rho * kappa * theta * dt / xi
+                    + (kappa * rho / xi - 0.5) * (v + v_next) * dt / 2
+                    + rho * (v_next - v) / xi
+                )
+                v = v_next
+            s = np.sqrt(s2)
+            log_S = log_S + s * Z_perp
+            score = score + s * Z_perp
+            information = information + s2
+
+        with stage("exp") as recorder:
+            S_T = recorder.track(np.exp(log_S))
+        with stage("weights") as recorder:
+            weight = recorder.track(score / (S0 * np.maximum(information, 1e-300)))
+
+        return S_T, weight
+
+
+###################
+# Local Vol Model #
+###################
+
+
+class LocalVolModel:
+    """Local volatility model dS_t = r S_t dt + sigma(t, S_t) S_t dW_t
+
+    The log price is advanced with an Euler scheme together with its first
+    variation y_i = d log S_i / dS0, y_{i+1} = y_i (1 + a_i (dW_i - sigma_i dt))
+    with a_i = S_i dsigma/dS (t_i, S_i). The Malliavin derivative of log S_T
+    along dW_i is sigma_i y_T / y_{i+1}, so the direction y_{i+1} / (sigma_i T)
+    recovers the tangent and its Skorokhod integral gives the delta weight
+    (1/T) sum_i (y_{i+1} dW_i - y_i a_i dt) / sigma_i, accumulated along the
+    path and unbiased for the discretized model. With a constant volatility it
+    is the Black&Scholes weight W_T / (S0 sigma T).
+    """
+
+    def __init__(self, vol, vol_derivative=None):
+        """Constructor
+
+        Args:
+            vol (function): local volatility, vectorized and called as vol(t, S)
+            vol_derivative (function, optional): derivative of vol with respect to S, called as
+                                                 vol_derivative(t, S), central finite difference
+                                                 of vol if None. Defaults to None.
+        """
+        self.name = "local_vol"
+        self.params = {}
+        self.vol = vol
+        self.vol_derivative = vol_derivative
+
+    def __vol_derivative(self, t, S):
+        """Derivative of the local volatility with respect to the price
+
+        Args:
+            t (float): time
+            S (np.ndarray): prices
+
+        Returns:
+            np.ndarray: dsigma/dS at (t, S)
+        """
+        if self.vol_derivative is not None:
+            return self.vol_derivative(t, S)
+        h = 1e-4 * S
+        return (self.vol(t, S + h) - self.vol(t, S - h)) / (2 * h)
+
+    def _simulate(self, S0, r, T, n_steps, N, rng=None, dtype=np.float64):
+        """Simulates S_T and the Malliavin delta weight in one pass
+
+        Args:
+            S0 (float or np.ndarray): price of the underlying at t=0, (n,1) columns share paths
+            r (float or np.ndarray): interest rate
+            T (float): maturity
+            n_steps (int): number of time steps
+            N (int): number of paths
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            (np.ndarray,np.ndarray): terminal prices S_T and delta weights, one per path
+        """
+        dt = T / n_steps
+        S = S0 * np.ones(N, dtype=dtype)
+        log_S = np.log(S)
+        tangent = 1 / S
+        score = 0.0
+
+        for i in range(n_steps):
+            t = i * dt
+            dW = draw_normals(N, rng, dtype=dtype) * dt ** 0.5
+            sigma = self.vol(t, S)
+            slope = S * self.__vol_derivative(t, S)
+            next_tangent = tangent * (1 + slope * (dW - sigma * dt))
+            score = score + (next_tangent * dW - tangent * slope * dt) / sigma
+            tangent = next_tangent
+            log_S = log_S + (r - sigma ** 2 / 2) * dt + sigma * dW
+            with stage("exp") as recorder:
+                S = recorder.track(np.exp(log_S))
+
+        return S, score / T
+
+
+##########################
+# Model Derivative Class #
+##########################
+
+
+class ModelDerivative(Derivative):
+    """European derivative priced under a Heston or local volatility model
+
+    The payoff, strike, spot, rate and maturity come from an EuropeanDerivative
+    (EuropeanCall, DigitalOption, CorridorOption, ...), the dynamic from the
+    model. Each simulation returns the price and its Malliavin delta together,
+    instead of bumping and re-simulating the whole Euler scheme.
+    """
+
+    # parameters of params used by the simulation, "vol" is copied from the
+    # template but the model gives the volatility
+    BUMPABLE_PARAMS = ["price_0", "strike", "interest_rate", "maturity"]
+
+    def __init__(self, derivative, model, n_steps=100):
+        """Constructor
+
+        Args:
+            derivative (EuropeanDerivative): derivative giving the payoff and contract parameters
+            model (HestonModel or LocalVolModel): dynamic of the underlying
+            n_steps (int, optional): number of time steps. Defaults to 100.
+        """
+        self.name = "_".join([model.name, derivative.name])
+        self.params = dict(derivative.params)
+        self.payoff = derivative.payoff
+        self.model = model
+        self.n_steps = n_steps
+
+    def _evaluate_payoff(self, S_T, K):
+        """Evaluates the vectorized payoff on a batch of terminal prices
+
+        Args:
+            S_T (np.ndarray): terminal prices of the underlying
+            K (float or tuple or np.ndarray): strike(s)
+
+        Returns:
+            np.ndarray: payoff for each terminal price
+        """
+        with stage("payoff") as recorder:
+            return recorder.track(self.payoff(S_T, K))
+
+    def __check_param(self, param__):
+        """Checks that a bumped parameter is used by the model
+
+        Args:
+            param__ (str): name of the bumped parameter
+
+        Raises:
+            Exception: param__ should be in BUMPABLE_PARAMS
+        """
+        if param__ not in self.BUMPABLE_PARAMS:
+            raise Exception(f"Invalid param__ {param__} not in {self.BUMPABLE_PARAMS}")
+
+    ######################
+    # Monte-Carlo pricer #
+    ######################
+
+    @instrumented
+    def price_monte_carlo(self, N, epsilon=0, param__=None, rng=None, dtype=np.float64):
+        """Prices derivative under the model
+
+        Args:
+            N (int): number of Monte Carlo simulations
+            epsilon (float, optional): used to offset a certain parameter, this is used
+                                       to compute greeks with finite difference method easily. Defaults to 0.
+            param__ (str, optional): parameter in BUMPABLE_PARAMS offset with epsilon if
+                                     different than None, every bound of a tuple strike is
+                                     offset. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: param__ should be in BUMPABLE_PARAMS
+
+        Returns:
+            float : price of the derivative
+        """
+        params__ = self.params.copy()
+        if param__:
+            self.__check_param(param__)
+            params__[param__] = bump_param(self.params[param__], epsilon)
+
+        return self._samples(N, params__, rng, dtype)["price"].mean(dtype=np.float64)
+
+    ########################################
+    # Greeks with finite difference method #
+    ########################################
+
+    @instrumented
+    def greeks_difference_method(
+        self, N, epsilon, param__, order=1, crn=False, rng=None, dtype=np.float64
+    ):
+        """Computes greeks with finite difference method
+
+        Args:
+            N (int): number of iterations
+            epsilon (float): epsilon used in finite diferent method for derivative estimation
+            param__ (str): parameter in BUMPABLE_PARAMS, every bound of a tuple strike is bumped
+            order (int, optional): order of derivative. Defaults to 1.
+            crn (bool, optional): if True, bumped and unbumped paths share the same Brownian
+                                  increments (common random numbers). Defaults to False.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: param__ should be in BUMPABLE_PARAMS
+            Exception: order should be in [1,2]
+
+        Returns:
+            float: value of the greek
+        """
+        self.__check_param(param__)
+        if order not in [1, 2]:
+            raise Exception(f"Invalid order {order} not in [1,2]")
+
+        if crn:
+            params__ = self.params.copy()
+            value = self.params[param__]
+            params__[param__] = scenario_column(
+                [value, bump_param(value, epsilon), bump_param(value, -epsilon)]
+            )
+            prices = np.broadcast_to(
+                self._samples(N, params__, rng, dtype)["price"], (3, N)
+            ).mean(axis=-1, dtype=np.float64)
+        else:
+            prices = [
+                self.price_monte_carlo(N, eps, param__, rng, dtype)
+                for eps in [0, epsilon, -epsilon]
+            ]
+
+        if order == 1:
+            return (prices[1] - prices[2]) / (epsilon * 2)
+        return (prices[1] + prices[2] - 2 * prices[0]) / (epsilon ** 2)
+
+    ##########################
+    # Exact values of greeks #
+    ##########################
+
+    def greeks_exact(self):
+        """Computes exact values of the greeks for the derivative
+
+        Raises:
+            Exception: no formula is available !
+        """
+        raise Exception("No exact formula is available !")
+
+    #############################
+    # Malliavin Calculus greeks #
+    #############################
+
+    def _samples(self, N, params__=None, rng=None, dtype=np.float64):
+        """Per-path discounted samples of the price and of the Malliavin delta
+
+        Args:
+            N (int): number of paths
+            params__ (dict, optional): contract parameters, self.params if None. Entries may
+                                       be (n,1) columns sharing the same paths. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: arrays of per-path samples for "price" and "delta"
+        """
+        if params__ is None:
+            params__ = self.params
+        r, T = params__["interest_rate"], params__["maturity"]
+
+        S_T, weight = self.model._simulate(
+            params__["price_0"], r, T, self.n_steps, N, rng, dtype
+        )
+        discounted_payoff = np.exp(-r * T) * self._evaluate_payoff(S_T, params__["strike"])
+
+        return {"price": discounted_payoff, "delta": discounted_payoff * weight}
+
+    @instrumented
+    def greeks_malliavin(self, N, param__, order, rng=None, dtype=np.float64):
+        """Computes delta using Malliavin Calculus
+
+        Args:
+            N (int): number of iterations for MC
+            param__ (str): "price_0"
+            order (int): 1
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: only delta is available
+
+        Returns:
+            float: delta of the option
+        """
+        if (param__, order) != ("price_0", 1):
+            raise Exception("Only delta (param__='price_0', order=1) is available")
+
+        return self._samples(N, rng=rng, dtype=dtype)["delta"].mean(dtype=np.float64)
+
+    @instrumented
+    def greeks_malliavin_all(self, N, rng=None, dtype=np.float64):
+        """Computes price and Malliavin delta in a single pass
+
+        Args:
+            N (int): number of iterations for MC
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: estimates of "price" and "delta"
+        """
+        return {
+            greek: samples.mean(dtype=np.float64)
+            for greek, samples in self._samples(N, rng=rng, dtype=dtype).items()
+        }
+
+    @instrumented
+    def greeks_malliavin_streaming(self, N, batch_size=2 ** 16, rng=None, dtype=np.float64):
+        """Price and Malliavin delta with constant memory whatever the number of paths
+
+        Args:
+            N (int): number of iterations for MC
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**16.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: (estimate, standard error) of "price" and "delta"
+        """
+        stats = RunningStats()
+        remaining = N
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            stats.update(self._samples(size, rng=rng, dtype=dtype))
+            remaining -= size
+
+        return stats.result()
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,187 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                             File Name: parallel.py                             #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                 parallel Monte Carlo with independent streams                  #
+##################################################################################
+
+############
+# packages #
+############
+
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import merge_worker_stats, profiled_call, profiling
+from running_stats import RunningStats
+import numpy as np
+import functools
+import os
+
+
+##################
+# Worker helpers #
+##################
+
+
+def _shard_sizes(N, n_workers):
+    """Splits a path budget into near equal shards
+
+    Args:
+        N (int): total number of paths
+        n_workers (int): number of shards
+
+    Returns:
+        list of int: number of paths of each shard
+    """
+    return [N // n_workers + (i < N % n_workers) for i in range(n_workers)]
+
+
+def _partial_stats(derivative, method, N, batch_size, source, kwargs, dtype=np.float64):
+    """Runs one shard of a streaming estimator on its own random stream
+
+    Args:
+        derivative (EuropeanDerivative): derivative to price
+        method (str): "malliavin" or "difference"
+        N (int): number of paths of the shard
+        batch_size (int): number of paths simulated per block
+        source (np.random.SeedSequence or ScenarioStream): seed of the shard's stream,
+                                                           or its slice of a scenario store
+        kwargs (dict): arguments of the finite difference samples
+        dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                    Defaults to np.float64.
+
+    Raises:
+        Exception: method should be in ["malliavin", "difference"]
+
+    Returns:
+        RunningStats: running mean and variance of the shard
+    """
+    if isinstance(source, np.random.SeedSequence):
+        rng = np.random.default_rng(source)
+    else:
+        rng = source
+
+    if method == "malliavin":
+        sampler = derivative._malliavin_samples
+    elif method == "difference":
+        sampler = lambda G: derivative._difference_samples(G, **kwargs)
+    else:
+        raise Exception(f"Invalid method {method} not in ['malliavin','difference']")
+
+    return derivative._stream(N, sampler, batch_size, rng, dtype)
+
+
+############################
+# Parallel Monte Carlo run #
+############################
+
+
+class ParallelMonteCarlo:
+    """Shards Monte Carlo estimators of a derivative across a process pool
+
+    Each worker draws from an independent stream spawned from one
+    np.random.SeedSequence, or reads its own slice of a shared scenario store,
+    and the partial running statistics are merged in worker order, so results
+    are identical for a fixed seed (or store) and worker count. Under an
+    active Profiler the stages recorded by the workers are merged into it.
+    """
+
+    def __init__(
+        self, n_workers=None, seed=0, batch_size=2 ** 16, store=None, dtype=np.float64
+    ):
+        """Constructor
+
+        Args:
+            n_workers (int, optional): number of worker processes, all cores if None. Defaults to None.
+            seed (int, optional): root seed of the random streams. Defaults to 0.
+            batch_size (int, optional): number of paths simulated per block in each worker.
+                                        Defaults to 2**16.
+            store (ScenarioStore, optional): memory-mapped scenarios sliced across workers
+                                             instead of random streams. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+        """
+        self.n_workers = n_workers or os.cpu_count()
+        self.seed = seed
+        self.batch_size = batch_size
+        self.store = store
+        self.dtype = dtype
+
+    def _run(self, derivative, method, N, kwargs=None):
+        """Runs the shards in the pool and reduces their running statistics
+
+        Args:
+            derivative (EuropeanDerivative): derivative to price
+            method (str): "malliavin" or "difference"
+            N (int): total number of paths
+            kwargs (dict, optional): arguments of the finite difference samples. Defaults to None.
+
+        Returns:
+            RunningStats: running mean and variance over all paths
+        """
+        shards = _shard_sizes(N, self.n_workers)
+        if self.store is None:
+            sources = np.random.SeedSequence(self.seed).spawn(self.n_workers)
+        else:
+            offsets = np.cumsum([0] + shards)
+            sources = [
+                self.store.stream(offsets[i], offsets[i + 1]) for i in range(self.n_workers)
+            ]
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+            partials = pool.map(
+                functools.partial(profiled_call, profiling(), _partial_stats),
+                [derivative] * self.n_workers,
+                [method] * self.n_workers,
+                shards,
+                [self.batch_size] * self.n_workers,
+                sources,
+                [kwargs or {}] * self.n_workers,
+                [self.dtype] * self.n_workers,
+            )
+            stats = RunningStats()
+            for partial, estimators in partials:
+                stats.merge(partial)
+                merge_worker_stats(estimators)
+
+        return stats
+
+    def greeks_malliavin(self, derivative, N):
+        """Price and Malliavin greeks computed in parallel
+
+        Args:
+            derivative (EuropeanDerivative): derivative to price
+            N (int): total number of paths
+
+        Returns:
+            dict: (estimate, standard error) of "price", "delta", "vega" and "gamma"
+        """
+        return self._run(derivative, "malliavin", N).result()
+
+    def greeks_difference(self, derivative, N, epsilon, param__, order=1):
+        """Finite difference greeks (common random numbers) computed in parallel
+
+        Args:
+            derivative (EuropeanDerivative): derivative to price
+            N (int): total number of paths
+            epsilon (float or list of floats): bump size(s)
+            param__ (str or list of str): name(s) of parameters in derivative.params to bump
+            order (int or list of ints, optional): order(s) of derivative in [1,2]. Defaults to 1.
+
+        Returns:
+            dict: (estimate, standard error) for each (param__, epsilon, order) key
+        """
+        kwargs = {"epsilon": epsilon, "param__": param__, "order": order}
+        return self._run(derivative, "difference", N, kwargs).result()
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,378 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                         File Name: path_derivative.py                          #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                        path dependent derivative class                         #
+##################################################################################
+
+############
+# packages #
+############
+
+from abstract_derivative import Derivative
+from european_derivative import draw_normals, malliavin_weights
+from instrumentation import instrumented, stage
+from running_stats import RunningStats
+import numpy as np
+
+
+###################################
+# Path Dependent Derivative Class #
+###################################
+
+
+class PathDerivative(Derivative):
+    """Path dependent derivatives monitored on a uniform time grid
+
+    The underlying follows a Black&Scholes dynamic simulated step by step over
+    n_steps dates. Only the running statistics of each path (terminal price,
+    running average, minimum and maximum) are kept, so memory is O(paths)
+    whatever the number of steps. The payoff is called as payoff(path, K) with
+    path a dict of these statistics.
+    """
+
+    #################
+    # Class Builder #
+    #################
+
+    def __init__(self, S0, K, r, sigma, T, n_steps, payoff, name):
+        """Constructor of path dependent derivative
+
+        Args:
+            S0 (float): price of asset at t=0
+            K (float or tuple of strikes): strike, or strike and barrier
+            r (float): interest rate
+            sigma (float): volatility
+            T (float): maturity
+            n_steps (int): number of monitoring dates, uniformly spaced up to T
+            payoff (function): vectorized payoff of the option, called as payoff(path, K)
+                               with path a dict of arrays "terminal", "average", "min"
+                               and "max" over the monitoring dates
+            name (str): name of the option
+        """
+        self.name = "_".join(["path", name])
+        self.params = {
+            "price_0": S0,
+            "strike": K,
+            "interest_rate": r,
+            "vol": sigma,
+            "maturity": T,
+        }
+        self.n_steps = n_steps
+        self.payoff = payoff
+
+    ###################
+    # Path simulation #
+    ###################
+
+    def _simulate(self, N, params__, rng=None, dtype=np.float64):
+        """Simulates the paths step by step keeping only their running statistics
+
+        Args:
+            N (int): number of paths
+            params__ (dict): model parameters, same keys as self.params. Entries may be
+                             (n,1) columns, every scenario then shares the same increments.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            (dict,np.ndarray,np.ndarray): running statistics "terminal", "average", "min"
+                                          and "max" of each path, the normal draws of the
+                                          first step and the vega score summed over the steps
+        """
+        r, T, S0, sigma = (
+            params__["interest_rate"],
+            params__["maturity"],
+            params__["price_0"],
+            params__["vol"],
+        )
+        dt = T / self.n_steps
+        drift = (r - sigma ** 2 / 2) * dt
+        diffusion = sigma * dt ** 0.5
+
+        log_S, total, running_min, running_max, vega_score = 0.0, 0.0, np.inf, -np.inf, 0.0
+        for step in range(self.n_steps):
+            Z = draw_normals(N, rng, dtype=dtype)
+            if step == 0:
+                Z_first = Z
+            log_S = log_S + drift + diffusion * Z
+            with stage("exp") as recorder:
+                S = recorder.track(S0 * np.exp(log_S))
+            total = total + S
+            running_min = np.minimum(running_min, S)
+            running_max = np.maximum(running_max, S)
+            vega_score = vega_score + (Z * Z - 1) / sigma - Z * dt ** 0.5
+
+        path = {
+            "terminal": S,
+            "average": total / self.n_steps,
+            "min": running_min,
+            "max": running_max,
+        }
+
+        return path, Z_first, vega_score
+
+    def _evaluate_payoff(self, path, K):
+        """Evaluates the vectorized payoff on the running statistics of a batch of paths
+
+        Args:
+            path (dict): running statistics of the paths, see _simulate
+            K (float or tuple or np.ndarray): strike(s)
+
+        Returns:
+            np.ndarray: payoff of each path
+        """
+        with stage("payoff") as recorder:
+            return recorder.track(self.payoff(path, K))
+
+    ######################
+    # Monte-Carlo pricer #
+    ######################
+
+    @instrumented
+    def price_monte_carlo(self, N, epsilon=0, param__=None, rng=None, dtype=np.float64):
+        """Prices derivative under Black&Scholes assumptions
+
+        Args:
+            N (int): number of Monte Carlo simulations
+            epsilon (float, optional): used to offset a certain parameter, this is used
+                                       to compute greeks with finite difference method easily. Defaults to 0.
+            param__ (str, optional): parameter of black & scholes model to offset with
+                                    espsilon if diffrent this None. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            float : price of the derivative
+        """
+        params__ = self.params.copy()
+        if param__:
+            params__[param__] = self.params[param__] + epsilon
+
+        path, _, _ = self._simulate(N, params__, rng, dtype)
+
+        return (
+            self._evaluate_payoff(path, params__["strike"]).sum(dtype=np.float64)
+            * np.exp(-params__["interest_rate"] * params__["maturity"])
+            / N
+        )
+
+    ########################################
+    # Greeks with finite difference method #
+    ########################################
+
+    @instrumented
+    def greeks_difference_method(
+        self, N, epsilon, param__, order=1, crn=False, rng=None, dtype=np.float64
+    ):
+        """Computes greeks with finite difference method
+
+        Args:
+            N (int): number of iterations
+            epsilon (float): epsilon used in finite diferent method for derivative estimation
+            param__ (str): name of parameter to which we compute greek
+            order (int, optional): order of derivative. Defaults to 1.
+            crn (bool, optional): if True, bumped and unbumped paths share the same Brownian
+                                  increments (common random numbers). Defaults to False.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: order should be in [1,2]
+
+        Returns:
+            float: value of the greek
+        """
+        if order not in [1, 2]:
+            raise Exception(f"Invalid order {order} not in [1,2]")
+
+        if crn:
+            return self._difference_samples(N, epsilon, param__, order, rng, dtype).mean(
+                dtype=np.float64
+            )
+        if order == 2:
+            return (
+                self.price_monte_carlo(N, epsilon, param__, rng, dtype)
+                + self.price_monte_carlo(N, -epsilon, param__, rng, dtype)
+                - 2 * self.price_monte_carlo(N, rng=rng, dtype=dtype)
+            ) / (epsilon ** 2)
+        return (
+            self.price_monte_carlo(N, epsilon, param__, rng, dtype)
+            - self.price_monte_carlo(N, -epsilon, param__, rng, dtype)
+        ) / (epsilon * 2)
+
+    def _difference_samples(self, N, epsilon, param__, order=1, rng=None, dtype=np.float64):
+        """Per-path finite difference samples, the three scenarios sharing the same paths
+
+        Args:
+            N (int): number of paths
+            epsilon (float): bump size
+            param__ (str): name of the parameter in self.params to bump
+            order (int, optional): order of derivative in [1,2]. Defaults to 1.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            np.ndarray: per-path samples of the greek
+        """
+        params__ = self.params.copy()
+        value = self.params[param__]
+        params__[param__] = np.array([value, value + epsilon, value - epsilon])[:, None]
+
+        path, _, _ = self._simulate(N, params__, rng, dtype)
+        discount = np.exp(-params__["interest_rate"] * params__["maturity"])
+        prices = np.broadcast_to(
+            discount * self._evaluate_payoff(path, params__["strike"]), (3, N)
+        )
+
+        if order == 1:
+            return (prices[1] - prices[2]) / (epsilon * 2)
+        return (prices[1] + prices[2] - 2 * prices[0]) / (epsilon ** 2)
+
+    ##########################
+    # Exact values of greeks #
+    ##########################
+
+    def greeks_exact(self):
+        """Computes exact values of the greeks for the derivative
+
+        Raises:
+            Exception: no formula is available !
+        """
+        raise Exception("No exact formula is available !")
+
+    #############################
+    # Malliavin Calculus greeks #
+    #############################
+
+    def _malliavin_samples(self, N, params__=None, rng=None, dtype=np.float64):
+        """Per-path discounted samples of the price and of the Malliavin greeks
+
+        A shift of S0 moves every monitored price, so the delta and gamma weights
+        integrate against the Brownian increment of the first step, the only one
+        that precedes all monitoring dates: they are the Black&Scholes weights over
+        a horizon T/n_steps. The vega weight sums the score of every increment,
+        (Z_i**2 - 1) / sigma - Z_i * sqrt(dt). With one step all three reduce to
+        the european weights.
+
+        Args:
+            N (int): number of paths
+            params__ (dict, optional): model parameters, self.params if None. Defaults to None.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: arrays of per-path samples for "price", "delta", "vega" and "gamma"
+        """
+        if params__ is None:
+            params__ = self.params
+        r, T, S0, sigma = (
+            params__["interest_rate"],
+            params__["maturity"],
+            params__["price_0"],
+            params__["vol"],
+        )
+
+        path, Z_first, vega_score = self._simulate(N, params__, rng, dtype)
+        discounted_payoff = np.exp(-r * T) * self._evaluate_payoff(path, params__["strike"])
+        weights = malliavin_weights(Z_first, S0, sigma, T / self.n_steps)
+
+        return {
+            "price": discounted_payoff,
+            "delta": discounted_payoff * weights["delta"],
+            "vega": discounted_payoff * vega_score,
+            "gamma": discounted_payoff * weights["gamma"],
+        }
+
+    @instrumented
+    def greeks_malliavin(self, N, param__, order, rng=None, dtype=np.float64):
+        """Computes greeks using Malliavin Calculus
+
+        Args:
+            N (int): number of iterations for MC
+            param__ (str): name of parameter to which we compute our derivative (greek)
+            order (int): order of derivative
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Raises:
+            Exception: incompatible order and param__
+
+        Returns:
+            float: corresponding greeks
+        """
+        greek = {("price_0", 1): "delta", ("vol", 1): "vega", ("price_0", 2): "gamma"}.get(
+            (param__, order)
+        )
+        if greek is None:
+            raise Exception("Incompatible order and param__")
+
+        return self._malliavin_samples(N, rng=rng, dtype=dtype)[greek].mean(dtype=np.float64)
+
+    @instrumented
+    def greeks_malliavin_all(self, N, rng=None, dtype=np.float64):
+        """Computes price, delta, vega and gamma with Malliavin Calculus in a single pass
+
+        Args:
+            N (int): number of iterations for MC
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: estimates of "price", "delta", "vega" and "gamma"
+        """
+        return {
+            greek: samples.mean(dtype=np.float64)
+            for greek, samples in self._malliavin_samples(N, rng=rng, dtype=dtype).items()
+        }
+
+    @instrumented
+    def greeks_malliavin_streaming(self, N, batch_size=2 ** 16, rng=None, dtype=np.float64):
+        """Price and Malliavin greeks with constant memory whatever the number of paths
+
+        Args:
+            N (int): number of iterations for MC
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**16.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: (estimate, standard error) of "price", "delta", "vega" and "gamma"
+        """
+        stats = RunningStats()
+        remaining = N
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            stats.update(self._malliavin_samples(size, rng=rng, dtype=dtype))
+            remaining -= size
+
+        return stats.result()
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,216 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                            File Name: portfolio.py                             #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                        strike and maturity grid pricer                         #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_derivative import draw_normals
+from running_stats import RunningStats
+import numpy as np
+
+
+##########################
+# Strike / maturity grid #
+##########################
+
+
+def strike_column(strikes, dtype=np.float64):
+    """Shapes strikes so that payoffs broadcast them against a batch of paths
+
+    Args:
+        strikes (array-like): strikes of shape (n,), or (n, 2) for (K1, K2) corridors
+        dtype (np.dtype, optional): precision of the simulated paths, the columns are built
+                                    in it so that payoffs are not promoted. Defaults to np.float64.
+
+    Returns:
+        np.ndarray or tuple: column of strikes of shape (n, 1), or a tuple of such columns
+    """
+    strikes = np.asarray(strikes, dtype=dtype)
+    if strikes.ndim == 2:
+        return tuple(strikes[:, j][:, None] for j in range(strikes.shape[1]))
+    return strikes[:, None]
+
+
+class StrikeMaturityGrid:
+    """Prices a book of options on one underlying over a grid of strikes and maturities
+
+    The payoff and the model parameters (price_0, interest_rate, vol) come from a
+    template EuropeanDerivative. For each maturity one normal sample is drawn, S_T,
+    the discount factor and the Malliavin weights are computed once, and only the
+    payoff is broadcast across the strike axis.
+    """
+
+    def __init__(self, derivative, strikes, maturities):
+        """Constructor
+
+        Args:
+            derivative (EuropeanDerivative): template giving the payoff and model parameters
+            strikes (array-like): strikes of shape (n_K,), or (n_K, 2) for corridors
+            maturities (array-like): maturities in years, of shape (n_T,)
+        """
+        self.derivative = derivative
+        self.strikes = np.asarray(strikes, dtype=np.float64)
+        self.maturities = np.atleast_1d(np.asarray(maturities, dtype=np.float64))
+
+    def _params(self, T, dtype=np.float64):
+        """Model parameters of the contracts of one maturity
+
+        The strikes are a column in the precision of the paths and the maturity a
+        Python float, so neither promotes float32 paths to float64.
+
+        Args:
+            T (float): maturity in years
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: parameters, same keys as derivative.params, with a column of strikes
+        """
+        return dict(
+            self.derivative.params, strike=strike_column(self.strikes, dtype), maturity=float(T)
+        )
+
+    def greeks_malliavin(self, N, batch_size=2 ** 14, rng=None, dtype=np.float64):
+        """Price, delta, vega and gamma of every (maturity, strike) contract
+
+        Args:
+            N (int): number of iterations for MC, per maturity
+            batch_size (int, optional): number of paths simulated per block. Defaults to 2**14.
+            rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                                 state if None. Defaults to None.
+            dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                        Defaults to np.float64.
+
+        Returns:
+            dict: (estimate, standard error) matrices of shape (n_T, n_K) for
+                  "price", "delta", "vega" and "gamma"
+        """
+        results = []
+
+        for T in self.maturities:
+            params__ = self._params(T, dtype)
+            stats = RunningStats()
+            remaining = N
+            while remaining > 0:
+                size = min(batch_size, remaining)
+                G = draw_normals(size, rng, dtype=dtype)
+                stats.update(self.derivative._malliavin_samples(G, params__))
+                remaining -= size
+            results.append(stats.result())
+
+        return {
+            greek: (
+                np.array([result[greek][0] for result in results]),
+                np.array([result[greek][1] for result in results]),
+            )
+            for greek in results[0]
+        }
+
+
+#####################
+# Batch of contracts #
+#####################
+
+
+def check_contract(contract):
+    """Checks that contract parameters can be simulated under Black&Scholes
+
+    Args:
+        contract (dict): parameters or overrides, same keys as EuropeanDerivative.params
+
+    Raises:
+        Exception: values should be finite
+        Exception: price_0, strike, vol and maturity should be positive
+    """
+    for key, value in contract.items():
+        values = np.atleast_1d(np.asarray(value, dtype=np.float64))
+        if not np.all(np.isfinite(values)):
+            raise Exception(f"Invalid value {value!r} of {key}, should be finite")
+        if key != "interest_rate" and np.any(values <= 0):
+            raise Exception(f"Invalid value {value!r} of {key}, should be positive")
+
+
+def contract_params(derivative, contracts, dtype=np.float64):
+    """Stacks the parameter overrides of several contracts as columns
+
+    Args:
+        derivative (EuropeanDerivative): template giving the default parameters
+        contracts (list of dict): parameter overrides of each contract, same keys as
+                                  derivative.params
+        dtype (np.dtype, optional): precision of the simulated paths, the columns are built
+                                    in it so that paths are not promoted. Defaults to np.float64.
+
+    Raises:
+        Exception: overridden parameters should be keys of derivative.params
+
+    Returns:
+        dict: parameters, same keys as derivative.params, overridden ones of shape (n, 1)
+    """
+    params__ = dict(derivative.params)
+    for key in set().union(*contracts):
+        if key not in derivative.params:
+            raise Exception(f"Invalid parameter {key} not in {list(derivative.params)}")
+        values = [contract.get(key, derivative.params[key]) for contract in contracts]
+        if key == "strike":
+            params__[key] = strike_column(values, dtype)
+        else:
+            params__[key] = np.asarray(values, dtype=dtype)[:, None]
+
+    return params__
+
+
+def price_contracts(derivative, contracts, N, batch_size=2 ** 14, rng=None, dtype=np.float64):
+    """Malliavin price and greeks of several contracts sharing one normal sample
+
+    Each contract overrides some entries of the template's params (e.g. strike,
+    price_0, vol, maturity), the overrides are stacked as columns broadcasting
+    against the paths so the whole batch costs a single simulation.
+
+    Args:
+        derivative (EuropeanDerivative): template giving the payoff and default parameters
+        contracts (list of dict): parameter overrides of each contract, same keys as
+                                  derivative.params
+        N (int): number of iterations for MC, shared by all contracts
+        batch_size (int, optional): number of paths simulated per block. Defaults to 2**14.
+        rng (np.random.Generator, optional): source of normal draws, numpy's global
+                                             state if None. Defaults to None.
+        dtype (np.dtype, optional): precision of the simulated paths, see draw_normals.
+                                    Defaults to np.float64.
+
+    Raises:
+        Exception: overridden parameters should be keys of derivative.params
+
+    Returns:
+        list of dict: (estimate, standard error) of "price", "delta", "vega" and "gamma"
+                      for each contract
+    """
+    params__ = contract_params(derivative, contracts, dtype)
+    sampler = lambda G: derivative._malliavin_samples(G, params__)
+    result = derivative._stream(N, sampler, batch_size, rng, dtype).result()
+    result = {
+        greek: tuple(np.broadcast_to(value, (len(contracts),)) for value in values)
+        for greek, values in result.items()
+    }
+
+    return [
+        {greek: (float(mean[i]), float(std_error[i])) for greek, (mean, std_error) in result.items()}
+        for i in range(len(contracts))
+    ]
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,120 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: running_stats.py                           #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                running mean and variance of Monte Carlo samples                #
+##################################################################################
+
+############
+# packages #
+############
+
+import numpy as np
+
+
+#######################
+# Running Stats Class #
+#######################
+
+
+class RunningStats:
+    """Running mean and variance of several Monte Carlo estimators
+
+    Samples are fed by batches, each batch is reduced with numpy's pairwise
+    summation and merged into the running state with Chan's update (batched
+    Welford), so memory does not depend on the total number of paths. Sums are
+    accumulated in float64 whatever the precision of the samples.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+        self.count = 0
+        self.mean = {}
+        self.m2 = {}
+
+    def update(self, samples):
+        """Adds a batch of per-path samples
+
+        Args:
+            samples (dict): arrays of per-path samples, one entry per estimator, with paths
+                            along the last axis (leading axes are independent estimators)
+        """
+        batch = RunningStats()
+        for key, values in samples.items():
+            values = np.asarray(values)
+            batch.count = values.shape[-1]
+            batch.mean[key] = values.mean(axis=-1, dtype=np.float64)
+            batch.m2[key] = ((values - batch.mean[key][..., None]) ** 2).sum(
+                axis=-1, dtype=np.float64
+            )
+
+        self.merge(batch)
+
+    def merge(self, other):
+        """Merges the state of another RunningStats into this one
+
+        Args:
+            other (RunningStats): running stats over a disjoint set of paths
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count = other.count
+            self.mean = dict(other.mean)
+            self.m2 = dict(other.m2)
+            return
+
+        count = self.count + other.count
+        for key in other.mean:
+            delta = other.mean[key] - self.mean[key]
+            self.mean[key] = self.mean[key] + delta * other.count / count
+            self.m2[key] = (
+                self.m2[key] + other.m2[key] + delta ** 2 * self.count * other.count / count
+            )
+        self.count = count
+
+    def variance(self, key):
+        """Unbiased sample variance of one estimator
+
+        Args:
+            key (hashable): name of the estimator
+
+        Returns:
+            float or np.ndarray: sample variance of the per-path samples
+        """
+        if self.count < 2:
+            return np.full(np.shape(self.mean[key]), np.nan)
+        return self.m2[key] / (self.count - 1)
+
+    def std_error(self, key):
+        """Standard error of the Monte Carlo average of one estimator
+
+        Args:
+            key (hashable): name of the estimator
+
+        Returns:
+            float or np.ndarray: standard error of the mean
+        """
+        return np.sqrt(self.variance(key) / self.count)
+
+    def result(self):
+        """Estimates and standard errors of all estimators
+
+        Returns:
+            dict: (estimate, standard error) for each estimator
+        """
+        return {key: (self.mean[key], self.std_error(key)) for key in self.mean}
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
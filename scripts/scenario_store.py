@@ -0,0 +1,187 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: scenario_store.py                          #
+#                    Creation Date: October 16, 2026 10:12 AM                    #
+#                    Last Updated: October 16, 2026 10:12 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                    memory-mapped store of normal scenarios                     #
+##################################################################################
+
+############
+# packages #
+############
+
+import numpy as np
+
+
+########################
+# Scenario Store Class #
+########################
+
+
+class ScenarioStore:
+    """Memory-mapped file of standard normal scenarios
+
+    The scenarios are written once as a .npy file and then opened read-only
+    with np.memmap, so any number of processes share the same pages through
+    the OS cache and estimators read slices of them without copying.
+    """
+
+    def __init__(self, path):
+        """Opens an existing store
+
+        Args:
+            path (str): path of the .npy file of standard normals
+        """
+        self.path = path
+        self.normals = np.load(path, mmap_mode="r")
+
+    @classmethod
+    def create(cls, path, n_paths, seed=0, block_size=2 ** 20):
+        """Writes a new store of standard normals block by block
+
+        Args:
+            path (str): path of the .npy file to write
+            n_paths (int): number of standard normals
+            seed (int, optional): seed of np.random.default_rng. Defaults to 0.
+            block_size (int, optional): number of normals generated per block. Defaults to 2**20.
+
+        Returns:
+            ScenarioStore: the store opened read-only
+        """
+        rng = np.random.default_rng(seed)
+        normals = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(n_paths,))
+        for start in range(0, n_paths, block_size):
+            stop = min(start + block_size, n_paths)
+            normals[start:stop] = rng.standard_normal(stop - start)
+        normals.flush()
+        del normals
+
+        return cls(path)
+
+    def __len__(self):
+        """Number of scenarios in the store
+
+        Returns:
+            int: number of standard normals
+        """
+        return len(self.normals)
+
+    def terminal_prices(self, derivative, path, block_size=2 ** 20):
+        """Writes the terminal prices of a derivative's model on every scenario
+
+        Args:
+            derivative (EuropeanDerivative): derivative giving the model parameters
+            path (str): path of the .npy file to write
+            block_size (int, optional): number of paths computed per block. Defaults to 2**20.
+
+        Returns:
+            np.memmap: terminal prices S_T opened read-only
+        """
+        prices = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float64, shape=(len(self),)
+        )
+        for start in range(0, len(self), block_size):
+            stop = min(start + block_size, len(self))
+            prices[start:stop] = derivative._terminal_price(
+                self.normals[start:stop], derivative.params
+            )
+        prices.flush()
+        del prices
+
+        return np.load(path, mmap_mode="r")
+
+    def stream(self, start=0, stop=None):
+        """Sequential reader over a slice of the store
+
+        Args:
+            start (int, optional): index of the first scenario. Defaults to 0.
+            stop (int, optional): index after the last scenario, end of the store if None.
+                                  Defaults to None.
+
+        Returns:
+            ScenarioStream: reader usable as the rng of any estimator
+        """
+        return ScenarioStream(self.path, start, len(self) if stop is None else stop)
+
+
+#########################
+# Scenario Stream Class #
+#########################
+
+
+class ScenarioStream:
+    """Sequential reader of a scenario store used in place of a random generator
+
+    standard_normal(size) returns the next scenarios of the slice as read-only
+    views of the memory map. Pickling only carries the path and offsets, so
+    streams are sent to worker processes without copying arrays.
+    """
+
+    def __init__(self, path, start, stop):
+        """Constructor
+
+        Args:
+            path (str): path of the .npy file of standard normals
+            start (int): index of the first scenario
+            stop (int): index after the last scenario
+        """
+        self.path = path
+        self.start = start
+        self.stop = stop
+        self.cursor = start
+        self.normals = np.load(path, mmap_mode="r")
+
+    def standard_normal(self, size, dtype=np.float64):
+        """Next scenarios of the slice
+
+        Args:
+            size (int or tuple): shape of the draws
+            dtype (np.dtype, optional): precision of the draws, a converted copy is returned
+                                        if it differs from the store's. Defaults to np.float64.
+
+        Raises:
+            Exception: not enough scenarios left in the slice
+
+        Returns:
+            np.ndarray: read-only view (or converted copy) of the next scenarios
+        """
+        count = int(np.prod(size))
+        if self.cursor + count > self.stop:
+            raise Exception(
+                f"Scenario store exhausted: {count} requested, {self.stop - self.cursor} left"
+            )
+        draws = self.normals[self.cursor:self.cursor + count]
+        self.cursor += count
+
+        return draws.reshape(size).astype(dtype, copy=False)
+
+    def __getstate__(self):
+        """State sent to other processes, without the memory map
+
+        Returns:
+            dict: path and offsets of the stream
+        """
+        state = self.__dict__.copy()
+        del state["normals"]
+        return state
+
+    def __setstate__(self, state):
+        """Restores a stream and reopens its memory map
+
+        Args:
+            state (dict): path and offsets of the stream
+        """
+        self.__dict__.update(state)
+        self.normals = np.load(self.path, mmap_mode="r")
+
+
+if __name__ == "__main__":
+    pass
+
+###############
+# end-of-code #
+###############
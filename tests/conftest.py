@@ -0,0 +1,25 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                             File Name: conftest.py                             #
+#                    Creation Date: October 17, 2026 09:30 AM                    #
+#                    Last Updated: October 17, 2026 09:30 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                     pytest configuration of the test suite                     #
+##################################################################################
+
+############
+# packages #
+############
+
+import os
+import sys
+
+# the modules of scripts/ import each other by their bare names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts"))
+
+###############
+# end-of-code #
+###############
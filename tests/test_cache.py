@@ -0,0 +1,93 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                            File Name: test_cache.py                            #
+#                    Creation Date: October 17, 2026 09:30 AM                    #
+#                    Last Updated: October 17, 2026 09:30 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                            tests of the greek cache                            #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_call import EuropeanCall
+from cache import GreekCache, cache_key
+import numpy as np
+
+
+#########
+# Cache #
+#########
+
+Call = EuropeanCall(100, 100, 0.05, 0.2, 1)
+
+
+def test_hit_returns_the_seeded_estimate():
+    """A second call with the same seed is a hit and returns the same estimate
+    """
+    cache = GreekCache()
+    first = cache.compute(Call, "greeks_malliavin", 10_000, seed=1, param__="price_0", order=1)
+    second = cache.compute(Call, "greeks_malliavin", 10_000, seed=1, param__="price_0", order=1)
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_hit_is_a_copy():
+    """Mutating a returned estimate does not alter the cached one
+    """
+    cache = GreekCache()
+    cache.compute(Call, "greeks_malliavin_all", 10_000, seed=1)["price"] = 0.0
+    assert cache.compute(Call, "greeks_malliavin_all", 10_000, seed=1)["price"] > 0
+
+
+def test_unseeded_estimates_are_not_cached():
+    """Estimates without a seed are recomputed on every call
+    """
+    cache = GreekCache()
+    cache.compute(Call, "greeks_malliavin", 1_000, param__="price_0", order=1)
+    assert (cache.hits, cache.misses, len(cache.memory)) == (0, 0, 0)
+
+
+def test_keys_canonicalize_numbers():
+    """Ints, floats and 0-d arrays of the same value give the same key
+    """
+    assert cache_key(Call, "greeks_malliavin", 1_000, 1, epsilon=1) == cache_key(
+        Call, "greeks_malliavin", 1_000, 1, epsilon=np.array(1.0)
+    )
+
+
+def test_memory_eviction_is_least_recently_used():
+    """Above maxsize the least recently used estimate is evicted
+    """
+    cache = GreekCache(maxsize=2)
+    for seed in [1, 2]:
+        cache.compute(Call, "greeks_malliavin_all", 1_000, seed=seed)
+    cache.compute(Call, "greeks_malliavin_all", 1_000, seed=1)
+    cache.compute(Call, "greeks_malliavin_all", 1_000, seed=3)
+
+    seeds = [key[-1] for key in cache.memory]
+    assert seeds == [1, 3]
+
+
+def test_disk_tier_survives_the_memory_tier_and_its_budget(tmp_path):
+    """Evicted estimates are read back from disk, which keeps within its byte budget
+    """
+    cache = GreekCache(maxsize=1, disk_dir=str(tmp_path))
+    for seed in [1, 2]:
+        cache.compute(Call, "greeks_malliavin_all", 1_000, seed=seed)
+    cache.compute(Call, "greeks_malliavin_all", 1_000, seed=1)
+    assert cache.hits == 1
+
+    size = max(entry.stat().st_size for entry in tmp_path.iterdir())
+    cache = GreekCache(maxsize=1, disk_dir=str(tmp_path), disk_max_bytes=2 * size)
+    for seed in [3, 4, 5]:
+        cache.compute(Call, "greeks_malliavin_all", 1_000, seed=seed)
+    assert len(list(tmp_path.iterdir())) == 2
+
+###############
+# end-of-code #
+###############
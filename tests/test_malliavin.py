@@ -0,0 +1,152 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: test_malliavin.py                          #
+#                    Creation Date: October 17, 2026 09:30 AM                    #
+#                    Last Updated: October 17, 2026 09:30 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                  tests of the malliavin and difference greeks                  #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_call import EuropeanCall
+from digital_option import DigitalOption
+from corridor_option import CorridorOption
+from analytic import call_greeks, digital_greeks, corridor_greeks
+import numpy as np
+import pytest
+
+
+############
+# Products #
+############
+
+T, S0, sigma, r = 1, 100, 0.2, 0.05
+
+PRODUCTS = {
+    "call": (EuropeanCall(S0, 100, r, sigma, T), call_greeks(S0, 100, r, sigma, T)),
+    "digital": (DigitalOption(S0, 100, r, sigma, T), digital_greeks(S0, 100, r, sigma, T)),
+    "corridor": (
+        CorridorOption(S0, 90, 110, r, sigma, T),
+        corridor_greeks(S0, 90, 110, r, sigma, T),
+    ),
+}
+
+# estimates are accepted within this many standard errors of the exact value
+N_STD_ERRORS = 4
+
+
+#####################
+# Malliavin weights #
+#####################
+
+
+@pytest.mark.parametrize("product", PRODUCTS)
+def test_malliavin_greeks_match_closed_forms(product):
+    """Price, delta, vega and gamma agree with the Black&Scholes formulas
+    """
+    derivative, exact = PRODUCTS[product]
+    result = derivative.greeks_malliavin_streaming(2 ** 19, rng=np.random.default_rng(0))
+    for greek in ["price", "delta", "vega", "gamma"]:
+        estimate, std_error = result[greek]
+        assert abs(estimate - exact[greek]) <= N_STD_ERRORS * std_error, greek
+
+
+def test_higher_order_greeks_match_closed_forms():
+    """Vanna, volga, speed and rho of the call agree with the Black&Scholes formulas
+    """
+    derivative, exact = PRODUCTS["call"]
+    result = derivative.greeks_malliavin_streaming(
+        2 ** 20, rng=np.random.default_rng(1), higher_order=True
+    )
+    for greek in ["vanna", "volga", "speed", "rho"]:
+        estimate, std_error = result[greek]
+        assert abs(estimate - exact[greek]) <= N_STD_ERRORS * std_error, greek
+
+
+def test_single_greek_estimator_matches_single_pass():
+    """greeks_malliavin and greeks_malliavin_all give the same value on the same draws
+    """
+    derivative, _ = PRODUCTS["call"]
+    all_greeks = derivative.greeks_malliavin_all(
+        10_000, rng=np.random.default_rng(2), higher_order=True
+    )
+    for (param__, order), greek in {
+        ("price_0", 1): "delta",
+        ("vol", 1): "vega",
+        ("price_0", 2): "gamma",
+        ("vol", 2): "volga",
+        ("price_0", 3): "speed",
+        ("interest_rate", 1): "rho",
+    }.items():
+        value = derivative.greeks_malliavin(10_000, param__, order, rng=np.random.default_rng(2))
+        assert value == pytest.approx(all_greeks[greek], rel=1e-10), greek
+
+
+##################################
+# Finite differences against CRN #
+##################################
+
+
+@pytest.mark.parametrize("product", ["call", "digital"])
+def test_crn_differences_agree_with_malliavin(product):
+    """Common random number finite differences and Malliavin greeks estimate the same greeks
+    """
+    derivative, exact = PRODUCTS[product]
+    difference = derivative.greeks_difference_streaming(
+        2 ** 19, [1.0, 0.01], ["price_0", "vol"], rng=np.random.default_rng(3)
+    )
+    malliavin = derivative.greeks_malliavin_streaming(2 ** 19, rng=np.random.default_rng(4))
+    for greek, key in [("delta", ("price_0", 1.0, 1)), ("vega", ("vol", 0.01, 1))]:
+        (fd, fd_error), (weighted, weighted_error) = difference[key], malliavin[greek]
+        # a bump of 1 on S0 or of 0.01 on vol biases the differences by less than this
+        bias = 1e-3 * abs(exact[greek])
+        assert abs(fd - weighted) <= N_STD_ERRORS * np.hypot(fd_error, weighted_error) + bias
+
+
+def test_crn_differences_of_tuple_strikes():
+    """A corridor strike is bumped as a whole and gives -dC/dK1 - dC/dK2
+    """
+    derivative, _ = PRODUCTS["corridor"]
+    epsilon = 0.5
+    result = derivative.greeks_difference_streaming(
+        2 ** 19, epsilon, "strike", rng=np.random.default_rng(5)
+    )
+    up, down = corridor_greeks(S0, 90 + epsilon, 110 + epsilon, r, sigma, T), corridor_greeks(
+        S0, 90 - epsilon, 110 - epsilon, r, sigma, T
+    )
+    estimate, std_error = result[("strike", epsilon, 1)]
+    exact = (up["price"] - down["price"]) / (2 * epsilon)
+    assert abs(estimate - exact) <= N_STD_ERRORS * std_error
+
+
+####################
+# Single precision #
+####################
+
+
+@pytest.mark.parametrize("product", PRODUCTS)
+def test_float32_paths_stay_close_to_float64(product):
+    """float32 paths stay float32 and their estimates stay well within one standard error
+    """
+    derivative, _ = PRODUCTS[product]
+    G = np.random.default_rng(6).standard_normal(2 ** 18)
+    for sampler in [
+        derivative._malliavin_samples,
+        lambda G: derivative._localized_samples(G, 1.0),
+    ]:
+        double, single = sampler(G), sampler(G.astype(np.float32))
+        for greek, samples in single.items():
+            assert samples.dtype == np.float32, greek
+            std_error = double[greek].std() / len(G) ** 0.5
+            difference = samples.mean(dtype=np.float64) - double[greek].mean()
+            assert abs(difference) <= 1e-3 * std_error, greek
+
+###############
+# end-of-code #
+###############
@@ -0,0 +1,65 @@
+##################################################################################
+#                            Author: Anas ESSOUNAINI                             #
+#                          File Name: test_parallel.py                           #
+#                    Creation Date: October 17, 2026 09:30 AM                    #
+#                    Last Updated: October 17, 2026 09:30 AM                     #
+#                            Source Language: python                             #
+#Repository: https://github.com/AnasEss/malliavin-calculus-greeks-monte-carlo.git#
+#                                                                                #
+#                            --- Code Description ---                            #
+#                     tests of the parallel monte carlo runs                     #
+##################################################################################
+
+############
+# packages #
+############
+
+from european_call import EuropeanCall
+from parallel import ParallelMonteCarlo
+import numpy as np
+
+
+###############
+# Determinism #
+###############
+
+Call = EuropeanCall(100, 100, 0.05, 0.2, 1)
+
+
+def test_fixed_seed_is_reproducible():
+    """Two runs with the same seed and worker count give identical estimates
+    """
+    first = ParallelMonteCarlo(n_workers=2, seed=7, batch_size=2 ** 12).greeks_malliavin(
+        Call, 20_000
+    )
+    second = ParallelMonteCarlo(n_workers=2, seed=7, batch_size=2 ** 12).greeks_malliavin(
+        Call, 20_000
+    )
+    assert first == second
+
+
+def test_seeds_give_independent_estimates():
+    """Another seed gives other estimates, all within a few standard errors
+    """
+    first = ParallelMonteCarlo(n_workers=2, seed=7, batch_size=2 ** 12).greeks_malliavin(
+        Call, 20_000
+    )
+    second = ParallelMonteCarlo(n_workers=2, seed=8, batch_size=2 ** 12).greeks_malliavin(
+        Call, 20_000
+    )
+    for greek, (estimate, std_error) in first.items():
+        assert estimate != second[greek][0]
+        assert abs(estimate - second[greek][0]) <= 6 * np.hypot(std_error, second[greek][1])
+
+
+def test_difference_greeks_are_reproducible():
+    """Common random number differences are reproducible for a fixed seed
+    """
+    run = lambda: ParallelMonteCarlo(n_workers=2, seed=3, batch_size=2 ** 12).greeks_difference(
+        Call, 20_000, 1.0, "price_0"
+    )
+    assert run() == run()
+
+###############
+# end-of-code #
+###############